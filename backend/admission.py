@@ -0,0 +1,122 @@
+import asyncio
+import itertools
+from collections import Counter
+
+
+class Overloaded(Exception):
+    """No slot became free: the request should be rejected with Retry-After."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "route", "future")
+
+    def __init__(self, priority, seq, route, future):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.future = future
+
+
+class AdmissionControl:
+    """Concurrency limits for database-bound routes, with a bounded priority queue.
+
+    At most `capacity` requests run at once, and no route runs more than its
+    entry in `limits`. Requests beyond that wait in a queue of `queue_size`,
+    where lower `priorities` values are admitted first (ties in arrival
+    order). When the queue is full, a request either displaces the waiter
+    with the worst priority or is shed; waiters give up after
+    `wait_timeout` seconds. Shed requests raise Overloaded.
+    """
+
+    def __init__(self, capacity, queue_size=256, wait_timeout=2.0, limits=None, priorities=None, default_priority=10):
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.wait_timeout = wait_timeout
+        self.limits = limits or {}
+        self.priorities = priorities or {}
+        self.default_priority = default_priority
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.timed_out = 0
+        self._active = Counter()
+        self._shed = Counter()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _can_run(self, route):
+        return self.active < self.capacity and self._active[route] < self.limits.get(route, self.capacity)
+
+    def _start(self, route):
+        self.active += 1
+        self._active[route] += 1
+        self.admitted += 1
+
+    def _reject(self, route):
+        self.shed += 1
+        self._shed[route] += 1
+        return Overloaded(route)
+
+    async def acquire(self, route):
+        if self._can_run(route):
+            self._start(route)
+            return
+        priority = self.priorities.get(route, self.default_priority)
+        if len(self._waiters) >= self.queue_size:
+            worst = max(self._waiters, key=lambda waiter: (waiter.priority, waiter.seq), default=None)
+            if worst is None or worst.priority <= priority:
+                raise self._reject(route)
+            # Make room by shedding the least important waiter instead
+            self._waiters.remove(worst)
+            worst.future.set_exception(self._reject(worst.route))
+        waiter = _Waiter(priority, next(self._seq), route, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            # Shielded so a timeout does not cancel a slot granted at the same moment
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.wait_timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                return waiter.future.result()
+            self._waiters.remove(waiter)
+            self.timed_out += 1
+            raise self._reject(route)
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # The slot was granted but the request went away
+                self.release(route)
+            raise
+
+    def release(self, route):
+        self.active -= 1
+        self._active[route] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        # Hand free slots to the best waiters whose route is under its limit
+        while self._waiters and self.active < self.capacity:
+            runnable = [waiter for waiter in self._waiters if self._can_run(waiter.route)]
+            if not runnable:
+                return
+            waiter = min(runnable, key=lambda waiter: (waiter.priority, waiter.seq))
+            self._waiters.remove(waiter)
+            self._start(waiter.route)
+            waiter.future.set_result(None)
+
+    def stats(self):
+        stats = {
+            "capacity": self.capacity,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
+        for route in sorted(set(self.limits) | set(self.priorities)):
+            stats[f"{route}_active"] = self._active[route]
+            stats[f"{route}_shed"] = self._shed[route]
+        return stats
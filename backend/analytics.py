@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, time, timedelta, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# One document per UTC hour in `order_rollups`, keyed by the hour start:
+#   {_id: hour, orders, revenue, cancelled,
+#    items: {menu_item_id: {name, quantity, revenue}}}
+# orders/revenue/items count non-cancelled orders by their creation hour.
+
+
+def hour_of(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _increments(order, sign):
+    inc = {"orders": sign, "revenue": sign * order["total_amount"]}
+    names = {}
+    for item in order["items"]:
+        prefix = f"items.{item['menu_item_id']}"
+        inc[f"{prefix}.quantity"] = inc.get(f"{prefix}.quantity", 0) + sign * item["quantity"]
+        inc[f"{prefix}.revenue"] = inc.get(f"{prefix}.revenue", 0) + sign * item["price"] * item["quantity"]
+        names[f"{prefix}.name"] = item["name"]
+    return inc, names
+
+
+async def record_order_created(db, order):
+    inc, names = _increments(order, 1)
+    await db.order_rollups.update_one(
+        {"_id": hour_of(order["created_at"])}, {"$inc": inc, "$set": names}, upsert=True
+    )
+
+
+async def record_order_cancelled(db, order):
+    # Cancelled is terminal, so each order is taken out of the rollups at most once
+    inc, _ = _increments(order, -1)
+    inc["cancelled"] = 1
+    await db.order_rollups.update_one({"_id": hour_of(order["created_at"])}, {"$inc": inc}, upsert=True)
+
+
+async def record_orders_created(db, orders):
+    """record_order_created for a batch, one update per hour."""
+    hours = {}
+    for order in orders:
+        inc, names = _increments(order, 1)
+        totals, hour_names = hours.setdefault(hour_of(order["created_at"]), ({}, {}))
+        for key, value in inc.items():
+            totals[key] = totals.get(key, 0) + value
+        hour_names.update(names)
+    if hours:
+        await db.order_rollups.bulk_write([
+            UpdateOne({"_id": hour}, {"$inc": inc, "$set": names}, upsert=True)
+            for hour, (inc, names) in hours.items()
+        ], ordered=False)
+
+
+class RollupRecorder:
+    """Live rollup updates that never fail the order they count.
+
+    Orders are committed before their rollups are updated, so a failed
+    update is logged and counted rather than raised; `python analytics.py`
+    rebuilds the affected hours from the orders themselves.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.recorded = 0
+        self.failed = 0
+
+    async def order_created(self, order):
+        await self._record(record_order_created, order, count=1)
+
+    async def orders_created(self, orders):
+        await self._record(record_orders_created, orders, count=len(orders))
+
+    async def order_cancelled(self, order):
+        await self._record(record_order_cancelled, order, count=1)
+
+    async def _record(self, update, orders, count):
+        try:
+            await update(self.db, orders)
+        except Exception as e:
+            self.failed += count
+            logger.warning("Rollup update for %s orders failed (rebuild with analytics.py): %s", count, e)
+        else:
+            self.recorded += count
+
+    def stats(self):
+        return {"recorded": self.recorded, "failed": self.failed}
+
+
+def _hour_expression(field):
+    return {"$dateFromParts": {
+        "year": {"$year": field}, "month": {"$month": field},
+        "day": {"$dayOfMonth": field}, "hour": {"$hour": field},
+    }}
+
+
+class RebuildInProgress(Exception):
+    """Another rollup rebuild holds the lock."""
+
+
+# Lock document in `jobs`; a lock this old belongs to a rebuild that died
+REBUILD_LOCK = "order_rollups_rebuild"
+REBUILD_LOCK_STALE_AFTER = timedelta(hours=1)
+
+
+async def _order_totals(collection, match, exclude_live):
+    hour = _hour_expression("$created_at")
+    match_stages = [{"$match": match}]
+    if exclude_live:
+        # An archival run interrupted between copy and delete leaves an order
+        # in both collections; count the copy in `orders` only
+        match_stages += [
+            {"$lookup": {"from": "orders", "localField": "id", "foreignField": "id", "as": "live"}},
+            {"$match": {"live": {"$size": 0}}},
+        ]
+    order_totals = await collection.aggregate(match_stages + [
+        {"$group": {
+            "_id": hour,
+            "orders": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 0, 1]}},
+            "revenue": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 0, "$total_amount"]}},
+            "cancelled": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+        }},
+    ]).to_list(None)
+    item_totals = await collection.aggregate(match_stages + [
+        {"$match": {"status": {"$ne": "cancelled"}}},
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {"hour": hour, "item": "$items.menu_item_id"},
+            "name": {"$last": "$items.name"},
+            "quantity": {"$sum": "$items.quantity"},
+            "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}},
+        }},
+    ]).to_list(None)
+    return order_totals, item_totals
+
+
+async def rebuild_rollups(db, since=None, now=None):
+    """Recompute rollups from `orders` and `orders_archive` and swap them in.
+
+    Rebuilds every closed hour from `since` (all history when None); the
+    current hour keeps the counts of live orders. The rebuilt hours and a
+    copy of every other hour go to `order_rollups_staging`, which is then
+    renamed over `order_rollups` in one step, so readers never see a half
+    rebuilt collection. Rebuilds hold a lock in `jobs` and raise
+    RebuildInProgress instead of overlapping. Returns the number of hourly
+    documents rebuilt.
+    """
+    now = now or datetime.utcnow()
+    try:
+        await db.jobs.delete_one({"_id": REBUILD_LOCK, "started_at": {"$lt": now - REBUILD_LOCK_STALE_AFTER}})
+        await db.jobs.insert_one({"_id": REBUILD_LOCK, "started_at": now})
+    except DuplicateKeyError:
+        raise RebuildInProgress()
+    try:
+        return await _rebuild(db, since and hour_of(since), hour_of(now))
+    finally:
+        await db.jobs.delete_one({"_id": REBUILD_LOCK, "started_at": now})
+
+
+async def _rebuild(db, start, end):
+    window = {"$gte": start, "$lt": end} if start else {"$lt": end}
+    rollups = {}
+    for collection, exclude_live in ((db.orders, False), (db.orders_archive, True)):
+        order_totals, item_totals = await _order_totals(collection, {"created_at": window}, exclude_live)
+        for row in order_totals:
+            totals = rollups.setdefault(row["_id"], {"_id": row["_id"], "orders": 0, "revenue": 0, "cancelled": 0, "items": {}})
+            for key in ("orders", "revenue", "cancelled"):
+                totals[key] += row[key]
+        for row in item_totals:
+            items = rollups[row["_id"]["hour"]]["items"]
+            totals = items.setdefault(row["_id"]["item"], {"name": row["name"], "quantity": 0, "revenue": 0})
+            totals["quantity"] += row["quantity"]
+            totals["revenue"] += row["revenue"]
+
+    staging = db.order_rollups_staging
+    # Left behind by a rebuild that died before the swap
+    await staging.drop()
+    if rollups:
+        await staging.insert_many(list(rollups.values()))
+    # Copied last, right before the swap, to keep the window for live
+    # updates to the current hour as short as possible
+    kept = await db.order_rollups.find({"_id": {"$not": window}}).to_list(None)
+    if kept:
+        await staging.insert_many(kept)
+    if rollups or kept:
+        await staging.rename("order_rollups", dropTarget=True)
+    else:
+        await db.order_rollups.drop()
+    return len(rollups)
+
+
+async def load_rollups(db, start, end):
+    return await db.order_rollups.find({"_id": {"$gte": start, "$lt": end}}).sort("_id", 1).to_list(None)
+
+
+def utc_range(start, end, zone):
+    """Local dates [start, end] in `zone` as a naive UTC [from, to) range."""
+    def to_utc(day):
+        return datetime.combine(day, time(), zone).astimezone(timezone.utc).replace(tzinfo=None)
+    return to_utc(start), to_utc(end + timedelta(days=1))
+
+
+def daily_sales(rollups, zone):
+    days = {}
+    for rollup in rollups:
+        day = rollup["_id"].replace(tzinfo=timezone.utc).astimezone(zone).date().isoformat()
+        totals = days.setdefault(day, {"date": day, "orders": 0, "revenue": 0.0, "cancelled": 0})
+        totals["orders"] += rollup.get("orders", 0)
+        totals["revenue"] += rollup.get("revenue", 0)
+        totals["cancelled"] += rollup.get("cancelled", 0)
+    return [_with_average(totals) for totals in days.values()]
+
+
+def sales_summary(rollups):
+    totals = {"orders": 0, "revenue": 0.0, "cancelled": 0}
+    for rollup in rollups:
+        for key in totals:
+            totals[key] += rollup.get(key, 0)
+    return _with_average(totals)
+
+
+def top_items(rollups, limit):
+    items = {}
+    for rollup in rollups:
+        for item_id, item in rollup.get("items", {}).items():
+            totals = items.setdefault(item_id, {"menu_item_id": item_id, "name": item["name"], "quantity": 0, "revenue": 0.0})
+            totals["name"] = item["name"]
+            totals["quantity"] += item["quantity"]
+            totals["revenue"] += item["revenue"]
+    ranked = sorted((item for item in items.values() if item["quantity"] > 0), key=lambda item: (-item["quantity"], -item["revenue"]))
+    for item in ranked:
+        item["revenue"] = round(item["revenue"], 2)
+    return ranked[:limit]
+
+
+def _with_average(totals):
+    totals["revenue"] = round(totals["revenue"], 2)
+    totals["average_order_value"] = round(totals["revenue"] / totals["orders"], 2) if totals["orders"] else 0.0
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild hourly sales rollups from orders")
+    parser.add_argument("--days", type=int, help="only rebuild the last N days (default: all history)")
+    args = parser.parse_args()
+    from server import client, db
+
+    since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+    try:
+        count = await rebuild_rollups(db, since)
+        print(f"Rebuilt {count} hourly rollups")
+    except RebuildInProgress:
+        raise SystemExit("Another rollup rebuild is running")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
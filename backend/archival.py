@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+# Orders in these statuses never change again, so they can leave the hot collection
+FINISHED_STATUSES = ["completed", "cancelled"]
+
+
+async def archive_orders(db, older_than, batch_size=1000, now=None):
+    """Move finished orders last updated before `older_than` ago to `orders_archive`.
+
+    Each batch is copied before it is deleted, so a crash in between leaves
+    the order in both collections; the next run skips the duplicate copy and
+    finishes the delete. Returns the number of orders moved.
+    """
+    cutoff = (now or datetime.utcnow()) - older_than
+    query = {"status": {"$in": FINISHED_STATUSES}, "updated_at": {"$lt": cutoff}}
+    moved = 0
+    while True:
+        batch = await db.orders.find(query).sort("updated_at", 1).to_list(batch_size)
+        if not batch:
+            return moved
+        try:
+            await db.orders_archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                raise
+        ids = [order["id"] for order in batch]
+        result = await db.orders.delete_many({"id": {"$in": ids}, "status": {"$in": FINISHED_STATUSES}})
+        moved += result.deleted_count
+        if len(batch) < batch_size:
+            return moved
+
+
+class OrderArchiver:
+    """Background task running archive_orders every `interval` seconds."""
+
+    def __init__(self, db, older_than, interval=3600.0, batch_size=1000):
+        self.db = db
+        self.older_than = older_than
+        self.interval = interval
+        self.batch_size = batch_size
+        self.runs = 0
+        self.archived = 0
+        self._task = None
+
+    async def run_once(self):
+        moved = await archive_orders(self.db, self.older_than, self.batch_size)
+        self.runs += 1
+        self.archived += moved
+        if moved:
+            logger.info("Archived %s finished orders", moved)
+        return moved
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Order archival failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {"runs": self.runs, "archived": self.archived}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Move finished orders to orders_archive")
+    parser.add_argument("--days", type=float, default=30, help="archive orders finished more than N days ago (default: 30)")
+    args = parser.parse_args()
+    from server import client, db
+
+    try:
+        moved = await archive_orders(db, timedelta(days=args.days))
+        print(f"Archived {moved} orders")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
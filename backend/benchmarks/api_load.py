@@ -0,0 +1,235 @@
+"""Latency and throughput benchmark for the Cafito API.
+
+Drives server.app in-process through httpx's ASGI transport with a seeded,
+weighted mix of menu reads, order creation, order listing and status
+updates, then records per-operation p50/p95/p99 latency and throughput.
+
+    cd backend
+    python benchmarks/api_load.py --out load.json                # mongomock-motor
+    python benchmarks/api_load.py --mongo --out load.json        # real MongoDB at MONGO_URL
+    python benchmarks/api_load.py --baseline load.json           # compare with an earlier run
+
+    # the 1000-order list with and without FAST_JSON
+    python benchmarks/api_load.py --mix list_orders=1 --list-limit 1000 --out list.json
+    FAST_JSON=1 python benchmarks/api_load.py --mix list_orders=1 --list-limit 1000 --baseline list.json
+
+With --mongo the server runs against a scratch database that is dropped at
+the end. The same --seed gives the same request sequence, so runs on two
+commits are comparable.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from common import latency_summary, run_metadata, use_mongomock
+
+CATEGORIES = ["specialty_coffee", "traditional_coffee", "cold_beverages", "pastries", "breakfast", "snacks"]
+NEXT_STATUS = {"pending": "preparing", "preparing": "ready", "ready": "completed"}
+DEFAULT_MIX = "get_menu=50,create_order=20,list_orders=20,update_status=10"
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def menu_records(count):
+    return [{
+        "name": f"Bench Item {i}",
+        "name_ar": f"صنف {i}",
+        "description": "Benchmark menu item",
+        "description_ar": "صنف للاختبار",
+        "price": float(10 + i % 30),
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "image_url": None,
+        "available": True,
+    } for i in range(count)]
+
+
+def order_documents(count, menu, rng):
+    start = datetime.utcnow() - timedelta(minutes=count)
+    orders = []
+    for i in range(count):
+        lines = [{"menu_item_id": item["id"], "quantity": rng.randint(1, 3), "price": item["price"], "name": item["name"]}
+                 for item in rng.sample(menu, k=min(len(menu), rng.randint(1, 4)))]
+        created_at = start + timedelta(minutes=i)
+        orders.append({
+            "id": str(uuid.uuid4()),
+            "customer_name": f"Customer {i}",
+            "customer_phone": None,
+            "items": lines,
+            "total_amount": sum(line["price"] * line["quantity"] for line in lines),
+            "status": rng.choice(["completed", "completed", "cancelled", "pending", "preparing", "ready"]),
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    return orders
+
+
+class Workload:
+    def __init__(self, client, menu, open_orders, rng, list_limit=100):
+        self.client = client
+        self.list_limit = list_limit
+        self.menu_items = menu
+        # id -> status of orders that can still move forward
+        self.open_orders = open_orders
+        self.rng = rng
+
+    async def get_menu(self):
+        return await self.client.get("/api/menu")
+
+    async def create_order(self):
+        lines = [{"menu_item_id": item["id"], "quantity": self.rng.randint(1, 3)}
+                 for item in self.rng.sample(self.menu_items, k=min(len(self.menu_items), self.rng.randint(1, 4)))]
+        response = await self.client.post("/api/orders", json={"customer_name": "Bench", "items": lines})
+        if response.status_code == 200:
+            self.open_orders[response.json()["id"]] = "pending"
+        return response
+
+    async def list_orders(self):
+        return await self.client.get("/api/orders", params={"limit": self.list_limit})
+
+    async def update_status(self):
+        if not self.open_orders:
+            return await self.list_orders()
+        order_id = self.rng.choice(list(self.open_orders))
+        status = NEXT_STATUS[self.open_orders.pop(order_id)]
+        response = await self.client.patch(f"/api/orders/{order_id}/status", params={"status": status})
+        if response.status_code == 200 and status in NEXT_STATUS:
+            self.open_orders[order_id] = status
+        return response
+
+
+OPERATIONS = ["get_menu", "create_order", "list_orders", "update_status"]
+
+
+async def run(args):
+    import httpx
+
+    if args.mongo:
+        from dotenv import load_dotenv
+        from common import BACKEND_DIR
+        load_dotenv(BACKEND_DIR / '.env')
+        os.environ['DB_NAME'] = f"{os.environ['DB_NAME']}_bench_api_load"
+    else:
+        use_mongomock()
+    os.environ.setdefault('MENU_CACHE_POLL_SECONDS', '0')
+    import server
+    # The server logs at INFO; per-request client logging would swamp the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+
+    await server.client.drop_database(server.db.name)
+    await server.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/api/menu/bulk", json=menu_records(args.menu_items))
+            response.raise_for_status()
+            menu = (await client.get("/api/menu")).json()
+            seeded = order_documents(args.orders, menu, rng)
+            for offset in range(0, len(seeded), 5000):
+                await server.db.orders.insert_many(seeded[offset:offset + 5000], ordered=False)
+            open_orders = {order["id"]: order["status"] for order in seeded if order["status"] in NEXT_STATUS}
+            workload = Workload(client, menu, open_orders, rng, args.list_limit)
+
+            plan = rng.choices(names, weights=weights, k=args.requests)
+            samples = {name: [] for name in names}
+            errors = {name: 0 for name in names}
+            cursor = iter(plan)
+
+            async def worker():
+                for name in cursor:
+                    started = time.perf_counter()
+                    response = await getattr(workload, name)()
+                    samples[name].append((time.perf_counter() - started) * 1000)
+                    if response.status_code >= 400:
+                        errors[name] += 1
+
+            # Warm up caches and connection pools outside the measured window
+            for name in names:
+                await getattr(workload, name)()
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        await server.app.router.shutdown()
+        if args.mongo:
+            client = server.AsyncIOMotorClient(os.environ['MONGO_URL'])
+            await client.drop_database(server.db.name)
+            client.close()
+
+    return {
+        **run_metadata(),
+        "backend": "mongodb" if args.mongo else "mongomock",
+        "params": {
+            "menu_items": args.menu_items, "orders": args.orders, "requests": args.requests,
+            "concurrency": args.concurrency, "mix": mix, "seed": args.seed,
+            "list_limit": args.list_limit, "fast_json": server.FAST_JSON,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "operations": {
+            name: {**latency_summary(samples[name]), "errors": errors[name]} for name in names
+        },
+    }
+
+
+def print_result(result, baseline=None):
+    print(f"{result['params']['requests']} requests in {result['elapsed_s']}s "
+          f"({result['throughput_rps']} req/s, backend: {result['backend']}, "
+          f"fast_json: {result['params'].get('fast_json', False)})")
+    print(f"{'operation':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in result["operations"].items():
+        line = (f"{name:<14} {stats['count']:>6} {stats.get('p50_ms', '-'):>9} "
+                f"{stats.get('p95_ms', '-'):>9} {stats.get('p99_ms', '-'):>9} {stats['errors']:>7}")
+        previous = baseline and baseline["operations"].get(name)
+        if previous and previous.get("p95_ms") and stats.get("p95_ms"):
+            change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"   p95 {change:+.1f}% vs {baseline.get('git_revision') or 'baseline'}"
+        print(line)
+    if baseline:
+        change = (result["throughput_rps"] - baseline["throughput_rps"]) / baseline["throughput_rps"] * 100
+        print(f"throughput {change:+.1f}% vs {baseline.get('git_revision') or 'baseline'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo", action="store_true", help="use the MongoDB at MONGO_URL instead of mongomock-motor")
+    parser.add_argument("--menu-items", type=int, default=40)
+    parser.add_argument("--orders", type=int, default=1000, help="orders seeded before the run")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--list-limit", type=int, default=100, help="page size of list_orders (max 1000)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", type=Path, help="write results as JSON to this path")
+    parser.add_argument("--baseline", type=Path, help="earlier --out file to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_result(result, baseline)
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
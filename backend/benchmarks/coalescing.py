@@ -0,0 +1,141 @@
+"""Database queries issued by bursts of identical concurrent reads.
+
+Each round invalidates the menu cache (as a menu edit would), then fires
+--burst concurrent requests at each of GET /api/menu, GET /api/menu/category/X,
+GET /api/menu/{item_id} and GET /api/orders/{order_id} for one hot order, and
+counts the MongoDB commands they caused through the server's command listener.
+
+    cd backend
+    SINGLE_FLIGHT=0 python benchmarks/coalescing.py --out no_coalescing.json
+    python benchmarks/coalescing.py --baseline no_coalescing.json
+
+Needs a real MongoDB at MONGO_URL (mongomock-motor never has two queries
+in flight); the scratch database is dropped at the end.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from common import BACKEND_DIR, latency_summary, run_metadata
+
+from api_load import menu_records
+
+ROUTES = ["menu", "menu_category", "menu_item", "order"]
+
+
+def command_counts(metrics):
+    return {command: entry[0] for command, entry in list(metrics.db_commands.items())}
+
+
+async def run(args):
+    import httpx
+    from dotenv import load_dotenv
+
+    load_dotenv(BACKEND_DIR / '.env')
+    os.environ['DB_NAME'] = f"{os.environ['DB_NAME']}_bench_coalescing"
+    os.environ['MENU_CACHE_POLL_SECONDS'] = '0'
+    import server
+    from instrumentation import metrics
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    await server.client.drop_database(server.db.name)
+    await server.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        limits = httpx.Limits(max_connections=None)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+            response = await client.post("/api/menu/bulk", json=menu_records(args.menu_items))
+            response.raise_for_status()
+            menu = (await client.get("/api/menu")).json()
+            response = await client.post("/api/orders", json={
+                "customer_name": "Bench", "items": [{"menu_item_id": menu[0]["id"], "quantity": 1}],
+            })
+            response.raise_for_status()
+            paths = {
+                "menu": "/api/menu",
+                "menu_category": f"/api/menu/category/{menu[0]['category']}",
+                "menu_item": f"/api/menu/{menu[0]['id']}",
+                "order": f"/api/orders/{response.json()['id']}",
+            }
+
+            samples = {route: [] for route in ROUTES}
+            errors = {route: 0 for route in ROUTES}
+
+            async def fetch(route):
+                started = time.perf_counter()
+                response = await client.get(paths[route])
+                samples[route].append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors[route] += 1
+
+            before = command_counts(metrics)
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                server.menu_cache.invalidate()
+                await asyncio.gather(*(fetch(route) for route in ROUTES for _ in range(args.burst)))
+            elapsed = time.perf_counter() - started
+            after = command_counts(metrics)
+    finally:
+        await server.app.router.shutdown()
+        client = server.AsyncIOMotorClient(os.environ['MONGO_URL'])
+        await client.drop_database(server.db.name)
+        client.close()
+
+    commands = {command: after[command] - before.get(command, 0) for command in after}
+    requests = args.rounds * args.burst * len(ROUTES)
+    return {
+        **run_metadata(),
+        "params": {
+            "menu_items": args.menu_items, "rounds": args.rounds, "burst": args.burst,
+            "single_flight": server.SINGLE_FLIGHT,
+        },
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "db_commands": {command: count for command, count in sorted(commands.items()) if count},
+        "db_commands_total": sum(commands.values()),
+        "operations": {
+            route: {**latency_summary(samples[route]), "errors": errors[route]} for route in ROUTES
+        },
+    }
+
+
+def print_result(result, baseline=None):
+    print(f"{result['requests']} requests in {result['elapsed_s']}s "
+          f"(single_flight: {result['params']['single_flight']}): "
+          f"{result['db_commands_total']} MongoDB commands {result['db_commands']}")
+    if baseline:
+        print(f"baseline (single_flight: {baseline['params']['single_flight']}): "
+              f"{baseline['db_commands_total']} MongoDB commands {baseline['db_commands']}")
+    print(f"{'route':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for route, stats in result["operations"].items():
+        line = (f"{route:<14} {stats['count']:>6} {stats.get('p50_ms', '-'):>9} "
+                f"{stats.get('p95_ms', '-'):>9} {stats.get('p99_ms', '-'):>9} {stats['errors']:>7}")
+        previous = baseline and baseline["operations"].get(route)
+        if previous and previous.get("p95_ms") and stats.get("p95_ms"):
+            change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"   p95 {change:+.1f}% vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--menu-items", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--burst", type=int, default=100, help="concurrent requests per route and round")
+    parser.add_argument("--out", type=Path, help="write results as JSON to this path")
+    parser.add_argument("--baseline", type=Path, help="earlier --out file to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_result(result, baseline)
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def use_mongomock():
+    """Swap Motor for mongomock-motor; call before importing server."""
+    import motor.motor_asyncio
+    from mongomock.collection import Collection
+    from mongomock_motor import AsyncMongoMockClient
+
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    # mongomock re-reads find_one_and_update's result with the original filter
+    # unless the projection keeps _id, so a filter on the field being changed
+    # (as status updates use) finds nothing. Pin the filter to the _id first.
+    find_and_modify = Collection._find_and_modify
+
+    def find_and_modify_by_id(self, query, projection=None, update=None, upsert=False, sort=None, *args, **kwargs):
+        found = self.find_one(query, projection={"_id": 1}, sort=sort)
+        if found is not None:
+            query = {"_id": found["_id"]}
+        return find_and_modify(self, query, projection, update, upsert, sort, *args, **kwargs)
+
+    Collection._find_and_modify = find_and_modify_by_id
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples_ms):
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def run_metadata():
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
@@ -0,0 +1,118 @@
+"""Order lookup latency with and without the declared indexes.
+
+Seeds a scratch database with N orders, times the queries server.py runs
+(lookup by id, newest page, status page, updated_since sync) on the bare
+collection, then applies indexes.INDEXES and times them again.
+
+    cd backend
+    python benchmarks/order_lookup.py --orders 100000 --out order_lookup.json
+
+Needs a real MongoDB at MONGO_URL; the scratch database is dropped at the end.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from common import BACKEND_DIR, latency_summary, run_metadata
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import INDEXES, ensure_indexes
+
+STATUSES = ["pending", "preparing", "ready", "completed", "cancelled"]
+
+
+def make_orders(count, start):
+    orders = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=i * 7)
+        quantity = random.randint(1, 3)
+        orders.append({
+            "id": str(uuid.uuid4()),
+            "customer_name": f"Customer {i}",
+            "customer_phone": None,
+            "items": [{"menu_item_id": str(uuid.uuid4()), "quantity": quantity, "price": 18.0, "name": "Turkish Coffee"}],
+            "total_amount": 18.0 * quantity,
+            "status": random.choice(STATUSES),
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(minutes=5),
+        })
+    return orders
+
+
+async def seed(db, count, batch_size=5000):
+    start = datetime.utcnow() - timedelta(seconds=count * 7)
+    ids = []
+    for offset in range(0, count, batch_size):
+        batch = make_orders(min(batch_size, count - offset), start + timedelta(seconds=offset * 7))
+        await db.orders.insert_many(batch, ordered=False)
+        ids.extend(order["id"] for order in batch)
+    return ids, start
+
+
+async def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+
+async def run_queries(db, ids, start, repeat):
+    sync_from = start + timedelta(seconds=len(ids) * 7 - 3600)
+    queries = {
+        "find_one_by_id": lambda: db.orders.find_one({"id": random.choice(ids)}),
+        "newest_page": lambda: db.orders.find({}, {"_id": 0}).sort(
+            [("created_at", -1), ("id", -1)]).to_list(101),
+        "status_page": lambda: db.orders.find({"status": {"$in": ["pending"]}}, {"_id": 0}).sort(
+            [("created_at", -1), ("id", -1)]).to_list(101),
+        "updated_since": lambda: db.orders.find({"updated_at": {"$gt": sync_from}}, {"_id": 0}).sort(
+            [("updated_at", 1), ("id", 1)]).to_list(1001),
+    }
+    return {name: await timed(query, repeat) for name, query in queries.items()}
+
+
+async def main(args):
+    load_dotenv(BACKEND_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[f"{os.environ['DB_NAME']}_bench_order_lookup"]
+    await client.drop_database(db.name)
+    try:
+        print(f"Seeding {args.orders} orders...")
+        ids, start = await seed(db, args.orders)
+
+        print("Timing without indexes...")
+        before = await run_queries(db, ids, start, args.repeat)
+        await ensure_indexes(db, {"orders": INDEXES["orders"]})
+        print("Timing with indexes...")
+        after = await run_queries(db, ids, start, args.repeat)
+
+        result = {**run_metadata(), "orders": args.orders, "repeat": args.repeat, "without_indexes": before, "with_indexes": after}
+        print(f"{'query':<16} {'p50 before':>12} {'p50 after':>12} {'p95 before':>12} {'p95 after':>12}")
+        for name in before:
+            print(
+                f"{name:<16} {before[name]['p50_ms']:>12} {after[name]['p50_ms']:>12}"
+                f" {before[name]['p95_ms']:>12} {after[name]['p95_ms']:>12}"
+            )
+        if args.out:
+            Path(args.out).write_text(json.dumps(result, indent=2))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--out", help="write results as JSON to this path")
+    asyncio.run(main(parser.parse_args()))
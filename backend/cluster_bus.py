@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+# Event type dispatched locally when events from other processes may have been missed
+GAP = "gap"
+
+
+class ClusterBus:
+    """Broadcast of cache invalidations and order changes between server processes.
+
+    Events are inserted into a capped collection that every process tails
+    with a tailable-await cursor; each process skips its own events. When
+    a process may have missed events (its position in the capped collection
+    was overwritten before it read past it) it runs the `gap` handlers so
+    caches can reload from MongoDB instead.
+
+    Publishing is best effort: the change it announces is already committed,
+    so a failed insert is logged and counted rather than raised, and once
+    inserts work again a `gap` event tells the other processes to reload.
+    """
+
+    def __init__(self, db, collection="cluster_events", size=4 * 1024 * 1024, max_await_ms=500):
+        self.db = db
+        self.collection_name = collection
+        self.collection = db[collection]
+        self.size = size
+        self.max_await_ms = max_await_ms
+        self.origin = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+        self.gaps = 0
+        self.publish_failed = 0
+        self._missed = False
+        self._handlers = {}
+        self._task = None
+
+    def on(self, event_type, handler):
+        """Register an async `handler(data)` for events published by other processes."""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    async def publish(self, event_type, data=None):
+        try:
+            await self._resync_peers()
+            await self._insert(event_type, data)
+        except Exception as e:
+            self._missed = True
+            self.publish_failed += 1
+            logger.warning("Cluster bus publish of %s failed, peers will resync: %s", event_type, e)
+            return
+        self.published += 1
+
+    async def _insert(self, event_type, data=None):
+        return await self.collection.insert_one(
+            {"origin": self.origin, "type": event_type, "data": data, "at": datetime.utcnow()}
+        )
+
+    async def _resync_peers(self):
+        # After a failed publish the other processes missed a change: have
+        # them reload, the same as if their tail position had been overwritten
+        if self._missed:
+            await self._insert(GAP)
+            self._missed = False
+
+    async def start(self):
+        try:
+            await self.db.create_collection(self.collection_name, capped=True, size=self.size)
+        except CollectionInvalid:
+            pass
+        # Our own marker is the starting point, and keeps the collection non-empty
+        # (a tailable cursor on an empty capped collection dies immediately).
+        result = await self._insert("start")
+        self._task = asyncio.create_task(self._run(result.inserted_id))
+
+    async def _run(self, last_id):
+        while True:
+            try:
+                if await self.collection.find_one({"_id": last_id}, {"_id": 1}) is None:
+                    # Overwritten before we read past it: changes may be lost
+                    await self._dispatch(GAP, None)
+                    last_id = (await self._insert("start")).inserted_id
+                last_id = await self._tail(last_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cluster bus tailing failed, retrying: %s", e)
+                await asyncio.sleep(1)
+
+    async def _tail(self, last_id):
+        # Capped collections keep insertion order, so read forward from the
+        # start and skip everything up to and including the last event seen.
+        cursor = self.collection.find(cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(self.max_await_ms)
+        caught_up = False
+        while cursor.alive:
+            async for doc in cursor:
+                if not caught_up:
+                    caught_up = doc["_id"] == last_id
+                    continue
+                last_id = doc["_id"]
+                if doc["origin"] != self.origin and doc["type"] in self._handlers:
+                    self.received += 1
+                    await self._dispatch(doc["type"], doc.get("data"))
+            if not caught_up:
+                # Read to the end without finding it: let _run re-check for a gap
+                return last_id
+            await asyncio.sleep(0.05)
+            if self._missed:
+                try:
+                    await self._resync_peers()
+                except Exception as e:
+                    logger.debug("Cluster bus resync announcement failed, retrying: %s", e)
+        return last_id
+
+    async def _dispatch(self, event_type, data):
+        if event_type == GAP:
+            self.gaps += 1
+        for handler in self._handlers.get(event_type, []):
+            try:
+                await handler(data)
+            except Exception as e:
+                logger.error("Cluster bus handler for %s failed: %s", event_type, e)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {"published": self.published, "received": self.received, "gaps": self.gaps,
+                "publish_failed": self.publish_failed}
@@ -0,0 +1,126 @@
+import gzip
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Already compressed, or must reach the client unbuffered
+SKIPPED_TYPES = (b"image/", b"video/", b"audio/", b"text/event-stream", b"application/zip", b"application/gzip")
+
+
+def accepted_encoding(accept_encoding):
+    """Pick br or gzip from an Accept-Encoding header value, or None."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Brotli (when installed) or gzip for complete responses above a size threshold.
+
+    Streaming responses (server-sent events, exports, files) pass through
+    untouched, as do images and bodies that already carry an encoding.
+    Responses with a strong ETag, like the pre-serialized menu, are
+    compressed once per ETag and encoding and served from a small LRU.
+    """
+
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=5, cache_size=64):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        # (etag, encoding) -> compressed body
+        self._cache = OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = accepted_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                response_headers = dict(message.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"")
+                if b"content-encoding" in response_headers or content_type.startswith(SKIPPED_TYPES):
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small: not worth buffering or compressing
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            compressed = self._body(start, encoding, body)
+            await send(self._compressed_start(start, encoding, compressed))
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compress(self, encoding, body):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    def _body(self, start, encoding, body):
+        etag = dict(start.get("headers", [])).get(b"etag")
+        if etag is None or etag.startswith(b"W/"):
+            return self._compress(encoding, body)
+        key = (etag, encoding)
+        compressed = self._cache.get(key)
+        if compressed is None:
+            compressed = self._compress(encoding, body)
+            self._cache[key] = compressed
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return compressed
+
+    def _compressed_start(self, start, encoding, compressed):
+        headers = []
+        for name, value in start.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # A strong ETag names the identity bytes; the encoded variant is only weakly equal
+                value = b"W/" + value
+            if name == b"vary":
+                continue
+            headers.append((name, value))
+        vary = dict(start.get("headers", [])).get(b"vary")
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(compressed)).encode()))
+        return {**start, "headers": headers}
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a request with a different body."""
+
+
+class IdempotencyInProgress(Exception):
+    """Another worker holds the key and has not finished within the wait."""
+
+
+class IdempotencyStore:
+    """Run an operation at most once per idempotency key.
+
+    Keys are claimed in `collection` (`_id` is the key, so MongoDB enforces
+    uniqueness across workers, and a TTL index on `created_at` expires them)
+    and the operation's result is stored on the claim. Duplicates arriving
+    while the first request is still running in this process wait on it;
+    finished keys are answered from a small LRU without a query.
+
+    Every claim carries an operation id, generated before the operation
+    runs, that the operation commits under (for orders, the order id).
+    A claim left without a result - its request died, is still running on
+    another worker, or failed to store the result - is taken over once it
+    is `stale_after` seconds old: the committed result is looked up by the
+    operation id, and the operation only runs again under that same id,
+    so a unique index on it stops a second commit.
+    """
+
+    def __init__(self, collection, cache_size=10000, ttl=86400.0, wait_timeout=5.0, stale_after=30.0):
+        self.collection = collection
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.stale_after = timedelta(seconds=stale_after)
+        self.executed = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.replayed = 0
+        self.recovered = 0
+        # key -> (fingerprint, result, stored at)
+        self._cache = OrderedDict()
+        # key -> future resolved with (fingerprint, result, error) of the running request
+        self._inflight = {}
+
+    async def run(self, key, fingerprint, operation, recover):
+        """Return the stored result for `key`, or await `operation(op_id)` and store it.
+
+        `fingerprint` identifies the request body; reusing a key with another
+        body raises IdempotencyKeyReused. `recover(op_id)` returns the result
+        already committed under `op_id`, or None if there is none. The result
+        must be BSON-encodable.
+        """
+        cached = self._cached(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return self._check(cached[0], fingerprint, cached[1])
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            stored_fingerprint, result, error = await asyncio.shield(inflight)
+            if error is not None:
+                raise error
+            return self._check(stored_fingerprint, fingerprint, result)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._execute(key, fingerprint, operation, recover)
+        except BaseException as e:
+            future.set_result((fingerprint, None, e))
+            raise
+        else:
+            future.set_result((fingerprint, result, None))
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _execute(self, key, fingerprint, operation, recover):
+        op_id, result = await self._claim(key, fingerprint, recover)
+        if op_id is None:
+            self._remember(key, fingerprint, result)
+            return result
+        try:
+            result = await operation(op_id)
+        except Exception:
+            # A takeover can collide with the commit of the request it took
+            # over from, and an operation can fail after committing
+            result = await recover(op_id)
+            if result is None:
+                # Nothing committed: release the claim so the client can retry
+                await self.collection.delete_one({"_id": key, "op_id": op_id, "result": None})
+                raise
+            self.recovered += 1
+        else:
+            self.executed += 1
+        # If this write is lost the claim goes stale and is recovered by op_id
+        await self.collection.update_one({"_id": key, "op_id": op_id}, {"$set": {"result": result}})
+        self._remember(key, fingerprint, result)
+        return result
+
+    async def _claim(self, key, fingerprint, recover):
+        # Returns (op_id, None) once this request owns the key, or
+        # (None, result) when an earlier request already committed.
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            now = datetime.utcnow()
+            op_id = str(uuid.uuid4())
+            try:
+                await self.collection.insert_one(
+                    {"_id": key, "fingerprint": fingerprint, "op_id": op_id, "created_at": now, "result": None}
+                )
+                return op_id, None
+            except DuplicateKeyError:
+                pass
+            doc = await self.collection.find_one({"_id": key})
+            if doc is not None:
+                if doc.get("result") is not None:
+                    self.replayed += 1
+                    return None, self._check(doc["fingerprint"], fingerprint, doc["result"])
+                self._check(doc["fingerprint"], fingerprint, None)
+                if doc["created_at"] < now - self.stale_after:
+                    taken = await self.collection.update_one(
+                        {"_id": key, "result": None, "created_at": doc["created_at"]},
+                        {"$set": {"created_at": now}},
+                    )
+                    if taken.modified_count:
+                        logger.warning("Taking over stale idempotency key %s", key)
+                        result = await recover(doc["op_id"])
+                        if result is None:
+                            # Never committed (yet): run again under the same id
+                            return doc["op_id"], None
+                        self.recovered += 1
+                        await self.collection.update_one({"_id": key}, {"$set": {"result": result}})
+                        return None, result
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress(key)
+            await asyncio.sleep(0.05)
+
+    def _check(self, stored_fingerprint, fingerprint, result):
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyKeyReused()
+        return result
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[2] > self.ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _remember(self, key, fingerprint, result):
+        self._cache[key] = (fingerprint, result, time.monotonic())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def stats(self):
+        return {
+            "executed": self.executed,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+            "recovered": self.recovered,
+            "cached": len(self._cache),
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+import mimetypes
+import os
+import socket
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Served widths; requests are rounded up to one of these so the cache holds
+# a bounded number of variants per image.
+IMAGE_WIDTHS = (160, 320, 640, 960)
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+# Origin images are proxied as-is without Pillow, so only raster types
+# browsers cannot run script from are accepted.
+ALLOWED_MEDIA_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif", "image/avif")
+MAX_REDIRECTS = 3
+
+
+async def check_public_url(url):
+    """Raise ImageFetchError unless `url` is http(s) on a host with only public addresses."""
+    parsed = urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ImageFetchError(f"{url}: only http(s) URLs are fetched")
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, ValueError) as e:
+        raise ImageFetchError(f"{url}: {e}") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        # Loopback, private, link-local (cloud metadata), reserved, ...
+        if not address.is_global:
+            raise ImageFetchError(f"{url}: {address} is not a public address")
+
+
+async def http_fetcher(url, max_bytes=10 * 1024 * 1024):
+    """Default origin fetcher: GET the URL and return (bytes, content type).
+
+    Menu image URLs are set by whoever edits the menu, so every hop must be a
+    public http(s) address, the response must be an allowed image type, and
+    at most `max_bytes` are read.
+    """
+    import httpx
+
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        for _ in range(MAX_REDIRECTS + 1):
+            await check_public_url(url)
+            try:
+                async with client.stream("GET", url) as response:
+                    if response.is_redirect:
+                        url = str(response.url.join(response.headers["location"]))
+                        continue
+                    response.raise_for_status()
+                    media_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                    if media_type not in ALLOWED_MEDIA_TYPES:
+                        raise ImageFetchError(f"{url}: unsupported content type {media_type or 'none'}")
+                    if int(response.headers.get("content-length") or 0) > max_bytes:
+                        raise ImageFetchError(f"{url}: larger than {max_bytes} bytes")
+                    content = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        content += chunk
+                        if len(content) > max_bytes:
+                            raise ImageFetchError(f"{url}: larger than {max_bytes} bytes")
+                    return bytes(content), media_type
+            except httpx.HTTPError as e:
+                raise ImageFetchError(f"{url}: {e}") from e
+    raise ImageFetchError(f"{url}: too many redirects")
+
+
+def snap_width(width):
+    for candidate in IMAGE_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return IMAGE_WIDTHS[-1]
+
+
+def media_type_of(name):
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def resize(content, width):
+    with Image.open(io.BytesIO(content)) as image:
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format="WEBP", quality=80)
+    return output.getvalue()
+
+
+def _list_files(directory):
+    # (name, size), oldest modification first; runs in a worker thread
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+    return [(name, size) for _, name, size in sorted(entries)]
+
+
+def _write_file(path, content):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning("Could not evict cached image %s: %s", path.name, e)
+
+
+class ImageCache:
+    """Resized menu images on local disk, evicted least recently used.
+
+    Each origin URL is fetched once through `fetcher` (an async callable
+    returning (bytes, content type), replaceable for offline use) and kept
+    as `<digest><ext>`; width variants are written as `<digest>-<width>.webp`.
+    Concurrent misses share one origin download per URL and one resize per
+    variant. The LRU bookkeeping lives on the event loop; only file reads,
+    writes and deletes run in threads.
+    """
+
+    def __init__(self, directory, fetcher=http_fetcher, max_bytes=200 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.fetcher = fetcher
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.evictions = 0
+        # file name -> size, least recently used first
+        self._files = OrderedDict()
+        self._bytes = 0
+        # url digest -> origin file name
+        self._origins = {}
+        # variant or origin key -> task shared by concurrent misses
+        self._inflight = {}
+        self._scanned = False
+        self._scan_lock = asyncio.Lock()
+
+    async def _scan(self):
+        # Resume the LRU order from the previous run using modification times
+        async with self._scan_lock:
+            if self._scanned:
+                return
+            for name, size in await asyncio.to_thread(_list_files, self.directory):
+                self._files[name] = size
+                self._bytes += size
+                if "-" not in name:
+                    self._origins[name.split(".")[0]] = name
+            self._scanned = True
+
+    def _shared(self, key, make):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return asyncio.shield(task)
+
+    def _finished(self, key, task):
+        del self._inflight[key]
+        # Every caller may have gone away; don't log the failure as unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    async def get(self, url, width):
+        """Return (path, media type) of `url` resized to the snapped `width`."""
+        if not self._scanned:
+            await self._scan()
+        digest = hashlib.sha256(url.encode()).hexdigest()[:32]
+        if Image is None:
+            # Without Pillow every width is the origin itself
+            name = self._origins.get(digest)
+            if name is not None and await self._touch(name):
+                self.hits += 1
+                return self.directory / name, media_type_of(name)
+            self.misses += 1
+            name, _ = await self._shared(("origin", digest), lambda: self._origin(url, digest))
+            return self.directory / name, media_type_of(name)
+        name = f"{digest}-{snap_width(width)}.webp"
+        if await self._touch(name):
+            self.hits += 1
+            return self.directory / name, "image/webp"
+        self.misses += 1
+        await self._shared(name, lambda: self._variant(url, digest, name))
+        return self.directory / name, "image/webp"
+
+    async def _origin(self, url, digest):
+        """(file name, bytes) of the original image, downloaded at most once at a time."""
+        origin = self._origins.get(digest)
+        if origin is not None and await self._touch(origin):
+            try:
+                return origin, await asyncio.to_thread((self.directory / origin).read_bytes)
+            except FileNotFoundError:
+                self._forget(origin)
+        content, media_type = await self.fetcher(url)
+        self.fetches += 1
+        extension = mimetypes.guess_extension(media_type.split(";")[0].strip()) or ".bin"
+        origin = f"{digest}{extension}"
+        await self._write(origin, content)
+        self._origins[digest] = origin
+        return origin, content
+
+    async def _variant(self, url, digest, name):
+        # Every width of one URL derives from the same shared origin download
+        _, content = await self._shared(("origin", digest), lambda: self._origin(url, digest))
+        width = int(name.split("-")[1].split(".")[0])
+        resized = await asyncio.to_thread(resize, content, width)
+        await self._write(name, resized)
+
+    async def _write(self, name, content):
+        await asyncio.to_thread(_write_file, self.directory / name, content)
+        self._bytes += len(content) - self._files.pop(name, 0)
+        self._files[name] = len(content)
+        await self._evict()
+
+    async def _touch(self, name):
+        if name not in self._files:
+            return False
+        self._files.move_to_end(name)
+        try:
+            await asyncio.to_thread(os.utime, self.directory / name)
+        except FileNotFoundError:
+            # Evicted by another worker sharing the directory
+            self._forget(name)
+            return False
+        except OSError:
+            pass
+        return True
+
+    def _forget(self, name):
+        size = self._files.pop(name, None)
+        if size is not None:
+            self._bytes -= size
+
+    async def _evict(self):
+        # The newest file always stays, even if it alone exceeds the budget
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            evicted.append(self.directory / name)
+        if evicted:
+            await asyncio.to_thread(_remove_files, evicted)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "evictions": self.evictions,
+            "files": len(self._files),
+            "bytes": self._bytes,
+        }
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Status checks are diagnostic pings; MongoDB drops them after this long.
+STATUS_CHECK_TTL_SECONDS = 30 * 24 * 3600
+# Idempotency keys (keyed by `_id`) can be replayed for this long.
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 3600
+
+# Declared indexes per collection. Lookups filter on the application-level
+# `id`, the menu filters on category + available, and order listings page
+# on (created_at, id) / (updated_at, id), optionally narrowed by status.
+# The archival job picks finished orders by (status, updated_at), and order
+# search matches prefixes of the multikey `search_terms`.
+INDEXES = {
+    "menu_items": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("category", ASCENDING), ("available", ASCENDING)], name="category_available"),
+    ],
+    "orders": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+        IndexModel(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="status_created_at_id",
+        ),
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)], name="status_updated_at"),
+        IndexModel([("search_terms", ASCENDING)], name="search_terms"),
+    ],
+    "orders_archive": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("search_terms", ASCENDING)], name="search_terms"),
+    ],
+    "idempotency_keys": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=IDEMPOTENCY_KEY_TTL_SECONDS),
+    ],
+    "status_checks": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=STATUS_CHECK_TTL_SECONDS),
+    ],
+}
+
+# Index options that must match for an existing index to count as declared.
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _key(spec):
+    # Directions read back from the server may be floats (1.0); text/ttl keys are strings
+    return tuple(
+        (field, direction if isinstance(direction, str) else int(direction))
+        for field, direction in spec.items()
+    )
+
+
+def _options(spec):
+    return {option: spec.get(option) for option in COMPARED_OPTIONS if spec.get(option) is not None}
+
+
+async def check_indexes(db, spec=INDEXES):
+    """Compare declared indexes with the database.
+
+    Returns {collection: {"missing": [...], "extra": [...], "mismatched": [...]}}
+    where entries are index names; nothing is modified.
+    """
+    report = {}
+    for collection, models in spec.items():
+        existing = await db[collection].index_information()
+        existing_by_key = {
+            _key(dict(info["key"])): (name, info)
+            for name, info in existing.items() if name != "_id_"
+        }
+        missing, mismatched, declared_keys = [], [], set()
+        for model in models:
+            document = model.document
+            key = _key(document["key"])
+            declared_keys.add(key)
+            if key not in existing_by_key:
+                missing.append(document["name"])
+            elif _options(existing_by_key[key][1]) != _options(document):
+                mismatched.append(existing_by_key[key][0])
+        extra = [name for key, (name, _) in existing_by_key.items() if key not in declared_keys]
+        report[collection] = {"missing": missing, "extra": extra, "mismatched": mismatched}
+    return report
+
+
+async def ensure_indexes(db, spec=INDEXES):
+    """Create missing declared indexes and log anything that does not match."""
+    report = await check_indexes(db, spec)
+    for collection, result in report.items():
+        to_create = [m for m in spec[collection] if m.document["name"] in result["missing"]]
+        if to_create:
+            try:
+                await db[collection].create_indexes(to_create)
+                logger.info("Created indexes on %s: %s", collection, ", ".join(result["missing"]))
+            except OperationFailure as e:
+                logger.error("Could not create indexes on %s: %s", collection, e)
+        if result["extra"]:
+            logger.warning("Undeclared indexes on %s: %s", collection, ", ".join(result["extra"]))
+        if result["mismatched"]:
+            logger.warning(
+                "Indexes on %s differ from their declaration: %s",
+                collection, ", ".join(result["mismatched"]),
+            )
+    return report
+
+
+async def main(apply):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        report = await (ensure_indexes(db) if apply else check_indexes(db))
+        for collection, result in report.items():
+            print(f"{collection}:")
+            for kind in ("missing", "extra", "mismatched"):
+                print(f"  {kind}: {', '.join(result[kind]) or '-'}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # python indexes.py           -> report only
+    # python indexes.py --apply   -> create missing indexes
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main("--apply" in sys.argv[1:]))
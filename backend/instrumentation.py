@@ -0,0 +1,244 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+# Timings of the request being handled. Motor runs pymongo calls in executor
+# threads with a copy of the caller's context, so the command listener below
+# sees the same RequestTimings object as the request that issued the command.
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestTimings:
+    __slots__ = ("db", "db_commands", "validation", "serialization", "endpoint", "response", "_lock")
+
+    def __init__(self):
+        self.db = 0.0
+        self.db_commands = 0
+        self.validation = 0.0
+        self.serialization = 0.0
+        self.endpoint = 0.0
+        # Handler time after the endpoint returned: rendering the response
+        self.response = 0.0
+        self._lock = threading.Lock()
+
+    def add_db(self, seconds):
+        with self._lock:
+            self.db += seconds
+            self.db_commands += 1
+
+    def phases(self):
+        # Endpoint time not spent in the database, building models or encoding
+        app = max(0.0, self.endpoint - self.db - self.validation - self.serialization)
+        return {
+            "db": self.db,
+            "validation": self.validation,
+            "serialization": self.serialization + self.response,
+            "app": app,
+        }
+
+
+@contextmanager
+def track(phase):
+    """Attribute the time spent in the block to a phase of the current request."""
+    timings = _current_timings.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - started)
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+
+
+class Metrics:
+    """Process-wide request and database metrics in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}        # (route, method, status) -> count
+        self.durations = {}       # route -> Histogram of total request time
+        self.phase_seconds = {}   # (route, phase) -> seconds
+        self.db_commands = {}     # command -> [count, seconds, failures]
+
+    def observe_request(self, route, method, status, duration, timings):
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.durations.setdefault(route, Histogram()).observe(duration)
+            for phase, seconds in timings.phases().items():
+                self.phase_seconds[(route, phase)] = self.phase_seconds.get((route, phase), 0.0) + seconds
+
+    def observe_db(self, command, seconds, failed=False):
+        with self._lock:
+            entry = self.db_commands.setdefault(command, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            if failed:
+                entry[2] += 1
+
+    def render(self, stats=None):
+        """Render all metrics; `stats` maps a name prefix to a component's stats()."""
+        lines = []
+        with self._lock:
+            lines.append("# TYPE cafito_requests_total counter")
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'cafito_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+            lines.append("# TYPE cafito_request_duration_seconds histogram")
+            for route, histogram in sorted(self.durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram.buckets):
+                    lines.append(f'cafito_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {count}')
+                lines.append(f'cafito_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {histogram.count}')
+                lines.append(f'cafito_request_duration_seconds_sum{{route="{route}"}} {histogram.sum:.6f}')
+                lines.append(f'cafito_request_duration_seconds_count{{route="{route}"}} {histogram.count}')
+            lines.append("# TYPE cafito_request_phase_seconds_total counter")
+            for (route, phase), seconds in sorted(self.phase_seconds.items()):
+                lines.append(f'cafito_request_phase_seconds_total{{route="{route}",phase="{phase}"}} {seconds:.6f}')
+            lines.append("# TYPE cafito_db_commands_total counter")
+            lines.append("# TYPE cafito_db_command_seconds_total counter")
+            lines.append("# TYPE cafito_db_command_failures_total counter")
+            for command, (count, seconds, failures) in sorted(self.db_commands.items()):
+                lines.append(f'cafito_db_commands_total{{command="{command}"}} {count}')
+                lines.append(f'cafito_db_command_seconds_total{{command="{command}"}} {seconds:.6f}')
+                lines.append(f'cafito_db_command_failures_total{{command="{command}"}} {failures}')
+        for prefix, values in (stats or {}).items():
+            for key, value in values.items():
+                # Numeric stats only; ids and versions are not gauges
+                if isinstance(value, (bool, int, float)):
+                    lines.append(f"# TYPE cafito_{prefix}_{key} gauge")
+                    lines.append(f"cafito_{prefix}_{key} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class DbCommandListener(monitoring.CommandListener):
+    """Adds every MongoDB command's duration to the issuing request and the totals."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed):
+        seconds = event.duration_micros / 1_000_000
+        metrics.observe_db(event.command_name, seconds, failed)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add_db(seconds)
+
+
+class TimedRoute(APIRoute):
+    """Route class that splits handler time into endpoint and serialization.
+
+    Everything after the endpoint returns (response_model validation,
+    jsonable_encoder and JSON rendering) counts as serialization.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        endpoint = self.dependant.call
+
+        def record(started):
+            timings = _current_timings.get()
+            if timings is not None:
+                timings.endpoint += time.perf_counter() - started
+
+        # FastAPI decided await vs. threadpool from the original endpoint, so
+        # the wrapper has to be the same kind of callable
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*call_args, **call_kwargs):
+                started = time.perf_counter()
+                try:
+                    return await endpoint(*call_args, **call_kwargs)
+                finally:
+                    record(started)
+        else:
+            # Runs in the threadpool with a copy of the request's context
+            @functools.wraps(endpoint)
+            def timed_endpoint(*call_args, **call_kwargs):
+                started = time.perf_counter()
+                try:
+                    return endpoint(*call_args, **call_kwargs)
+                finally:
+                    record(started)
+
+        # Read at request time, so swapping it after the handler is built is enough
+        self.dependant.call = timed_endpoint
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            started = time.perf_counter()
+            response = await handler(request)
+            timings = _current_timings.get()
+            if timings is not None:
+                timings.response += max(0.0, time.perf_counter() - started - timings.endpoint)
+            return response
+
+        return timed_handler
+
+
+class TimingMiddleware:
+    """ASGI middleware recording per-route timings and optional Server-Timing headers."""
+
+    def __init__(self, app, server_timing=False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    total = time.perf_counter() - started
+                    entries = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.phases().items()]
+                    entries.append(f"total;dur={total * 1000:.2f}")
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(entries).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            endpoint = scope.get("endpoint")
+            route = endpoint.__name__ if endpoint is not None else "unmatched"
+            metrics.observe_request(route, scope["method"], status, time.perf_counter() - started, timings)
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import logging
+from collections import namedtuple
+
+from pymongo import ReturnDocument
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Document in `cache_versions` whose counter is bumped on every menu write.
+MENU_VERSION_KEY = "menu"
+
+
+async def bump_menu_version(db):
+    """Increment the shared menu version so every cache reloads the menu."""
+    doc = await db.cache_versions.find_one_and_update(
+        {"_id": MENU_VERSION_KEY},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+
+async def read_menu_version(db):
+    doc = await db.cache_versions.find_one({"_id": MENU_VERSION_KEY})
+    return doc["version"] if doc else 0
+
+
+class MenuBody:
+    """Pre-serialized JSON array of menu items with its strong ETag."""
+
+    def __init__(self, content):
+        self.content = content
+        self.etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+EMPTY_BODY = MenuBody(b"[]")
+
+MenuPrice = namedtuple("MenuPrice", ["price", "name", "available"])
+
+
+class MenuSnapshot:
+    """Immutable view of the whole menu at one version."""
+
+    def __init__(self, version, items, views=None):
+        self.version = version
+        # item id -> model, in collection order
+        self.items = items
+        # item id -> MenuPrice, what order pricing needs without a query
+        self.prices = {
+            item_id: MenuPrice(item.price, item.name, item.available)
+            for item_id, item in items.items()
+        }
+        # view name -> bodies; None is every field, other views a field subset
+        self.bodies = {None: self._render_bodies(None)}
+        for view, fields in (views or {}).items():
+            self.bodies[view] = self._render_bodies(fields)
+
+    def _render_bodies(self, fields):
+        # Serialize each available item once and splice the full menu and
+        # the per-category slices from the same bytes; key None is the full menu.
+        full = []
+        by_category = {}
+        for item in self.items.values():
+            if item.available:
+                encoded = item.model_dump_json(include=fields).encode()
+                full.append(encoded)
+                by_category.setdefault(item.category, []).append(encoded)
+        bodies = {None: MenuBody(b"[" + b",".join(full) + b"]")}
+        for category, parts in by_category.items():
+            bodies[category] = MenuBody(b"[" + b",".join(parts) + b"]")
+        return bodies
+
+    def body(self, category=None, view=None):
+        return self.bodies[view].get(category, EMPTY_BODY)
+
+    def render(self, category=None, fields=None):
+        """Serialize an ad-hoc field subset; views cover the common cases."""
+        return MenuBody(b"[" + b",".join(
+            item.model_dump_json(include=fields).encode() for item in self.available(category)
+        ) + b"]")
+
+    def available(self, category=None):
+        return [
+            item for item in self.items.values()
+            if item.available and (category is None or item.category == category)
+        ]
+
+
+class MenuCache:
+    """In-process menu cache keyed on the `cache_versions` counter.
+
+    Writes made through this process call `mark_changed()`; writes made
+    elsewhere (seed scripts, other workers) are picked up by the poller,
+    which compares the cached version with the counter document.
+    """
+
+    def __init__(self, db, model, poll_interval=5.0, views=None, single_flight=True):
+        self.db = db
+        self.model = model
+        # view name -> field set, pre-serialized with every snapshot
+        self.views = views or {}
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._snapshot = None
+        self._generation = 0
+        # Concurrent misses share one load per generation
+        self._flight = SingleFlight(enabled=single_flight)
+        self._poller = None
+
+    async def get(self):
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        # Keyed by generation: misses after an invalidation must not join a
+        # load that started before it. A failed load fails its waiters once
+        # instead of being retried by each of them in turn.
+        return await self._flight.do(self._generation, self._refresh)
+
+    async def _refresh(self):
+        generation = self._generation
+        snapshot = await self._load()
+        # Only keep the snapshot if nothing changed while it was loading.
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    async def _load(self):
+        # Read the version first: a write racing the load bumps it again,
+        # so the poller will still notice the newer menu.
+        version = await read_menu_version(self.db)
+        docs = await self.db.menu_items.find({}, {"_id": 0}).to_list(None)
+        self.loads += 1
+        items = {}
+        for doc in docs:
+            item = self.model(**doc)
+            items[item.id] = item
+        return MenuSnapshot(version, items, self.views)
+
+    def invalidate(self):
+        self._generation += 1
+        self._snapshot = None
+
+    async def mark_changed(self):
+        version = await bump_menu_version(self.db)
+        self.invalidate()
+        return version
+
+    async def check_version(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
+        version = await read_menu_version(self.db)
+        if version != snapshot.version:
+            logger.info("Menu version %s -> %s, invalidating cache", snapshot.version, version)
+            self.invalidate()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.check_version()
+            except Exception as e:
+                logger.warning("Menu version check failed: %s", e)
+
+    def start(self):
+        if self._poller is None and self.poll_interval > 0:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+
+    def stats(self):
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "shared_loads": self._flight.shared,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cached": snapshot is not None,
+            "version": snapshot.version if snapshot is not None else None,
+            "items": len(snapshot.items) if snapshot is not None else 0,
+        }
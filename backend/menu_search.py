@@ -0,0 +1,113 @@
+import bisect
+
+from text_normalize import strip_article, tokens
+
+# Where a word was found; a name match outranks a description or category match
+NAME, DESCRIPTION = 2, 1
+
+
+class MenuSearchIndex:
+    """In-memory inverted index over the bilingual menu for typeahead search.
+
+    Words of name/name_ar and description/description_ar/category are
+    normalized (see text_normalize.normalize) and mapped to item ids. A
+    sorted word list answers prefix lookups with bisect, so the last
+    word of a query can still be half typed. Arabic words are also indexed
+    without the definite article. `sync()` brings the index up to a menu
+    snapshot by re-indexing only items that changed, and `upsert()`
+    applies a single write straight away.
+    """
+
+    def __init__(self):
+        self.builds = 0
+        self.reindexed = 0
+        # word -> {item id: NAME or DESCRIPTION}
+        self._postings = {}
+        self._words = []
+        # item id -> (model, its words, pre-serialized JSON)
+        self._items = {}
+        self._snapshot = None
+
+    def sync(self, snapshot):
+        if snapshot is self._snapshot:
+            return
+        for item_id in [item_id for item_id in self._items if item_id not in snapshot.items]:
+            self._remove(item_id)
+        for item in snapshot.items.values():
+            current = self._items.get(item.id)
+            if current is None or current[0] != item:
+                self.upsert(item)
+        self._snapshot = snapshot
+        self.builds += 1
+
+    def upsert(self, item):
+        if item.id in self._items:
+            self._remove(item.id)
+        words = {}
+        for text in (item.description, item.description_ar, item.category.value.replace("_", " ")):
+            for word in tokens(text or ""):
+                words[word] = words[strip_article(word)] = DESCRIPTION
+        for text in (item.name, item.name_ar):
+            for word in tokens(text or ""):
+                words[word] = words[strip_article(word)] = NAME
+        for word, field in words.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                bisect.insort(self._words, word)
+            postings[item.id] = field
+        self._items[item.id] = (item, words, item.model_dump_json().encode())
+        self.reindexed += 1
+
+    def _remove(self, item_id):
+        _, words, _ = self._items.pop(item_id)
+        for word in words:
+            postings = self._postings[word]
+            del postings[item_id]
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def _matches(self, term):
+        """item id -> score for words equal to or starting with `term`."""
+        matches = {}
+        for index in range(bisect.bisect_left(self._words, term), len(self._words)):
+            word = self._words[index]
+            if not word.startswith(term):
+                break
+            # Whole words count double, names over descriptions
+            exact = 2 if word == term else 1
+            for item_id, field in self._postings[word].items():
+                matches[item_id] = max(matches.get(item_id, 0), field * exact)
+        return matches
+
+    def search(self, q, limit=20):
+        """Available items matching every word of `q` by prefix, best first."""
+        scores = None
+        for term in tokens(q):
+            matches = self._matches(strip_article(term))
+            if scores is None:
+                scores = matches
+            else:
+                scores = {item_id: score + matches[item_id] for item_id, score in scores.items() if item_id in matches}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        ranked = sorted(
+            (item_id for item_id in scores if self._items[item_id][0].available),
+            key=lambda item_id: (-scores[item_id], self._items[item_id][0].name),
+        )
+        return [self._items[item_id][0] for item_id in ranked[:limit]]
+
+    def body(self, q, limit=20):
+        """search() as a JSON array, spliced from each item's cached JSON."""
+        return b"[" + b",".join(self._items[item.id][2] for item in self.search(q, limit)) + b"]"
+
+    def stats(self):
+        return {
+            "builds": self.builds,
+            "reindexed": self.reindexed,
+            "items": len(self._items),
+            "words": len(self._words),
+        }
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+
+from pydantic import ValidationError
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from menu_cache import bump_menu_version
+
+# Fields a menu import may set; id and created_at are managed by the server.
+MENU_FIELDS = ["name", "name_ar", "description", "description_ar", "price", "category", "image_url", "available"]
+EXPORT_FIELDS = ["id"] + MENU_FIELDS
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+def parse_menu_json(data):
+    records = json.loads(data)
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError("Expected a JSON array of menu item objects")
+    return records
+
+
+def parse_menu_csv(data):
+    """Parse CSV with a header row; empty cells leave the field unchanged."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    records = []
+    for row in csv.DictReader(io.StringIO(data)):
+        record = {}
+        for field, value in row.items():
+            if field is None or value is None or value.strip() == "":
+                continue
+            field, value = field.strip(), value.strip()
+            if field == "available":
+                value = value.lower() in TRUE_VALUES
+            record[field] = value
+        records.append(record)
+    return records
+
+
+def plan_menu_sync(current, incoming, create_model, item_model, prune=False, insert_missing=True):
+    """Diff incoming records against the current menu documents.
+
+    Records match an existing item by `id`, then by `name`. Matched records
+    only need the fields they change. Returns (operations, report).
+    """
+    by_id = {doc["id"]: doc for doc in current}
+    by_name = {doc["name"]: doc for doc in current}
+    report = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "missing": [], "errors": []}
+    operations = []
+    seen = set()
+
+    for index, record in enumerate(incoming):
+        label = record.get("name") or record.get("id") or f"#{index}"
+        existing = by_id.get(record.get("id")) or by_name.get(record.get("name"))
+        if existing is None and not insert_missing:
+            report["missing"].append(label)
+            continue
+        key = existing["id"] if existing else record.get("name")
+        if key in seen:
+            report["errors"].append({"index": index, "item": label, "error": "Duplicate item in import"})
+            continue
+        seen.add(key)
+
+        fields = {field: record[field] for field in MENU_FIELDS if field in record}
+        base = {field: existing.get(field) for field in MENU_FIELDS} if existing else {}
+        try:
+            validated = create_model(**{**base, **fields}).model_dump(mode="json")
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            report["errors"].append({"index": index, "item": label, "error": errors})
+            continue
+
+        if existing is None:
+            extra = {"id": record["id"]} if record.get("id") else {}
+            item = item_model(**validated, **extra)
+            operations.append(InsertOne(item.model_dump()))
+            report["inserted"] += 1
+            continue
+        changes = {field: validated[field] for field in fields if validated[field] != existing.get(field)}
+        if changes:
+            operations.append(UpdateOne({"id": existing["id"]}, {"$set": changes}))
+            report["updated"] += 1
+        else:
+            report["unchanged"] += 1
+
+    if prune:
+        for doc in current:
+            if doc["id"] not in seen:
+                operations.append(DeleteOne({"id": doc["id"]}))
+                report["deleted"] += 1
+    return operations, report
+
+
+async def sync_menu(db, records, create_model, item_model, prune=False, insert_missing=True, dry_run=False):
+    """Apply only the differences between `records` and the menu in one bulk_write.
+
+    Nothing is written if any record fails validation. Returns the report,
+    with "applied" telling whether anything was written.
+    """
+    current = await db.menu_items.find({}, {"_id": 0}).to_list(None)
+    operations, report = plan_menu_sync(
+        current, records, create_model, item_model, prune=prune, insert_missing=insert_missing
+    )
+    report["applied"] = False
+    if operations and not report["errors"] and not dry_run:
+        await db.menu_items.bulk_write(operations, ordered=False)
+        report["applied"] = True
+    return report
+
+
+async def export_menu(db):
+    docs = await db.menu_items.find({}, {"_id": 0}).to_list(None)
+    return [{field: doc.get(field) for field in EXPORT_FIELDS} for doc in docs]
+
+
+def menu_to_csv(records):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow({field: "" if record.get(field) is None else record[field] for field in EXPORT_FIELDS})
+    return output.getvalue()
+
+
+def print_report(report):
+    print(
+        f"Inserted: {report['inserted']}, updated: {report['updated']}, "
+        f"unchanged: {report['unchanged']}, deleted: {report['deleted']}"
+    )
+    for name in report["missing"]:
+        print(f"Not on the menu: {name}")
+    for error in report["errors"]:
+        print(f"Error in {error['item']}: {error['error']}")
+    if report["errors"]:
+        print("Nothing was written because of the errors above")
+
+
+async def run_sync(records, prune=False, insert_missing=True, dry_run=False):
+    """Sync records into the configured database, for scripts and the CLI."""
+    # Imported here: server imports this module for the bulk endpoint
+    from server import MenuItem, MenuItemCreate, client, db
+
+    try:
+        report = await sync_menu(
+            db, records, MenuItemCreate, MenuItem, prune=prune, insert_missing=insert_missing, dry_run=dry_run
+        )
+        if report["applied"]:
+            # Tell running servers to reload their menu cache
+            await bump_menu_version(db)
+        return report
+    finally:
+        client.close()
+
+
+async def run_export(path):
+    from server import client, db
+
+    try:
+        records = await export_menu(db)
+    finally:
+        client.close()
+    if path.suffix.lower() == ".csv":
+        path.write_text(menu_to_csv(records), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Exported {len(records)} menu items to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export the Cafito menu")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="sync a JSON or CSV file into the menu")
+    import_parser.add_argument("file", type=Path)
+    import_parser.add_argument("--prune", action="store_true", help="delete items not in the file")
+    import_parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    export_parser = commands.add_parser("export", help="write the menu to a JSON or CSV file")
+    export_parser.add_argument("file", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        asyncio.run(run_export(args.file))
+        return
+    data = args.file.read_bytes()
+    records = parse_menu_csv(data) if args.file.suffix.lower() == ".csv" else parse_menu_json(data)
+    report = asyncio.run(run_sync(records, prune=args.prune, dry_run=args.dry_run))
+    print_report(report)
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Orders the kitchen still has to act on; anything else leaves the board
+ACTIVE_STATUSES = ("pending", "preparing", "ready")
+
+
+def stored_precision(moment):
+    # BSON dates keep milliseconds
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+class OrderBoard:
+    """In-process board of active orders, kept current by create/status changes.
+
+    The board is loaded once with an indexed query and then updated from
+    every order the server writes, so reads never touch MongoDB. The JSON
+    response is rendered once per change and reused until the next one.
+    """
+
+    def __init__(self, collection, model):
+        self.collection = collection
+        self.model = model
+        self.loads = 0
+        # order id -> (model, pre-serialized JSON)
+        self._orders = None
+        # Changes applied while a load is querying, replayed on top of it
+        self._loading = None
+        self._body = None
+        self._lock = asyncio.Lock()
+        self._flight = SingleFlight()
+
+    async def load(self):
+        async with self._lock:
+            self._loading = []
+            try:
+                docs = await self.collection.find(
+                    {"status": {"$in": list(ACTIVE_STATUSES)}}, {"_id": 0}
+                ).sort([("created_at", 1), ("id", 1)]).to_list(None)
+            except BaseException:
+                self._loading = None
+                raise
+            self._orders = {}
+            for doc in docs:
+                self._put(self.model(**doc))
+            changes, self._loading = self._loading, None
+            for order in changes:
+                self._apply(order)
+            self._body = None
+            self.loads += 1
+            logger.info("Order board loaded with %s active orders", len(self._orders))
+
+    def apply(self, order):
+        """Record a created or updated order model."""
+        if self._loading is not None:
+            self._loading.append(order)
+        elif self._orders is not None:
+            self._apply(order)
+
+    def _apply(self, order):
+        current = self._orders.get(order.id)
+        # Out-of-order updates must not resurrect an older status. Orders read
+        # back from MongoDB carry millisecond timestamps while in-process ones
+        # have microseconds, so compare at the stored precision and let the
+        # later arrival win within the same millisecond.
+        if current is not None and stored_precision(current[0].updated_at) > stored_precision(order.updated_at):
+            return
+        if order.status in ACTIVE_STATUSES:
+            self._put(order)
+        elif current is not None:
+            del self._orders[order.id]
+        self._body = None
+
+    def _put(self, order):
+        self._orders[order.id] = (order, order.model_dump_json().encode())
+
+    async def body(self):
+        """JSON object of active orders per status, oldest first."""
+        if self._orders is None:
+            # Requests arriving before the first load share it
+            await self._flight.do("load", self.load)
+        body = self._body
+        if body is None:
+            columns = {status: [] for status in ACTIVE_STATUSES}
+            for order, encoded in sorted(self._orders.values(), key=lambda entry: (entry[0].created_at, entry[0].id)):
+                columns[order.status.value].append(encoded)
+            body = b"{" + b",".join(
+                b'"%s":[%s]' % (status.encode(), b",".join(parts)) for status, parts in columns.items()
+            ) + b"}"
+            self._body = body
+        return body
+
+    def get(self, order_id):
+        """The active order with this id, or None (also before the first load)."""
+        entry = (self._orders or {}).get(order_id)
+        return entry[0] if entry is not None else None
+
+    def orders(self):
+        return [order for order, _ in (self._orders or {}).values()]
+
+    def stats(self):
+        counts = {status: 0 for status in ACTIVE_STATUSES}
+        for order, _ in (self._orders or {}).values():
+            counts[order.status.value] += 1
+        return {"loads": self.loads, "loaded": self._orders is not None, **counts}
@@ -0,0 +1,136 @@
+import asyncio
+import uuid
+from collections import deque
+
+
+class OrderEvent:
+    """One published change, pre-encoded once as a server-sent event frame."""
+
+    def __init__(self, event_id, event_type, data):
+        self.id = event_id
+        self.type = event_type
+        self.frame = f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n".encode()
+
+
+# Sent when a subscriber cannot be caught up from history (unknown or too old
+# resume token, or it fell behind); the client should refetch with updated_since.
+RESYNC = object()
+CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def push(self, item):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Never block publishers on a slow consumer: drop its backlog and
+            # tell it to resync instead of buffering without bound.
+            self.resync()
+
+    def resync(self):
+        self.overflowed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+
+    async def get(self):
+        item = await self.queue.get()
+        if item is RESYNC:
+            self.overflowed = False
+        return item
+
+
+class OrderEventBroker:
+    """In-process fan-out of order changes to stream subscribers.
+
+    Event ids are "<epoch>-<seq>"; the epoch changes on every restart so a
+    resume token from a previous process always triggers a resync.
+    """
+
+    def __init__(self, history=1000, queue_size=256):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self.published = 0
+        self.resyncs = 0
+        self._seq = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+
+    def publish(self, event_type, data):
+        """Publish an event; `data` is the already JSON-encoded payload."""
+        self._seq += 1
+        event = OrderEvent(f"{self.epoch}-{self._seq}", event_type, data)
+        self._history.append((self._seq, event))
+        self.published += 1
+        for subscription in self._subscribers:
+            if subscription.overflowed:
+                continue
+            subscription.push(event)
+            if subscription.overflowed:
+                self.resyncs += 1
+        return event
+
+    def subscribe(self, last_event_id=None):
+        subscription = Subscription(self.queue_size)
+        if last_event_id:
+            backlog = self._replay(last_event_id)
+            if backlog is None or len(backlog) >= self.queue_size:
+                self.resyncs += 1
+                subscription.push(RESYNC)
+            else:
+                for event in backlog:
+                    subscription.push(event)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscribers.discard(subscription)
+
+    def _replay(self, last_event_id):
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self._seq:
+            return None
+        if seq == self._seq:
+            return []
+        # The oldest retained event must directly follow the client's last one
+        if not self._history or self._history[0][0] > seq + 1:
+            return None
+        return [event for event_seq, event in self._history if event_seq > seq]
+
+    def resync_frame(self):
+        # Carries the current id so a reconnect after the refetch resumes from here
+        return f"id: {self.epoch}-{self._seq}\nevent: resync\ndata: {{}}\n\n".encode()
+
+    def resync_all(self):
+        """Send every subscriber a resync, e.g. after changes were missed."""
+        for subscription in self._subscribers:
+            if not subscription.overflowed:
+                subscription.resync()
+                self.resyncs += 1
+
+    def close(self):
+        for subscription in self._subscribers:
+            subscription.overflowed = False
+            try:
+                subscription.queue.put_nowait(CLOSED)
+            except asyncio.QueueFull:
+                subscription.queue.get_nowait()
+                subscription.queue.put_nowait(CLOSED)
+        self._subscribers.clear()
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "last_event_id": f"{self.epoch}-{self._seq}",
+        }
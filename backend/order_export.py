@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+# One CSV row per order; line items are folded into the `items` column
+CSV_FIELDS = [
+    "id", "created_at", "updated_at", "status", "customer_name", "customer_phone",
+    "item_count", "items", "total_amount", "notes",
+]
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_row(order):
+    items = order.get("items") or []
+    row = {
+        **order,
+        "created_at": order["created_at"].isoformat(),
+        "updated_at": order["updated_at"].isoformat(),
+        "item_count": sum(item["quantity"] for item in items),
+        "items": "; ".join(f"{item['quantity']} x {item['name']} @ {item['price']:.2f}" for item in items),
+        "total_amount": f"{order['total_amount']:.2f}",
+    }
+    return {field: _cell(row.get(field)) for field in CSV_FIELDS}
+
+
+async def stream_ndjson(cursor, batch_size):
+    """Yield one JSON object per line, one chunk per `batch_size` orders."""
+    lines = []
+    async for order in cursor:
+        lines.append(json.dumps(order, default=_default, ensure_ascii=False))
+        if len(lines) >= batch_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def stream_csv(cursor, batch_size):
+    """Yield the header row, then one chunk of CSV rows per `batch_size` orders.
+
+    The header starts with a UTF-8 BOM so spreadsheets read Arabic
+    names correctly.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+    output.write("﻿")
+    writer.writeheader()
+    yield output.getvalue().encode()
+    output.seek(0)
+    output.truncate()
+    rows = 0
+    async for order in cursor:
+        writer.writerow(_csv_row(order))
+        rows += 1
+        if rows >= batch_size:
+            yield output.getvalue().encode()
+            output.seek(0)
+            output.truncate()
+            rows = 0
+    if rows:
+        yield output.getvalue().encode()
@@ -0,0 +1,309 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, ConnectionFailure, ExecutionTimeout, PyMongoError, WTimeoutError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class OrderQueueFull(Exception):
+    pass
+
+
+def is_transient(error):
+    """Whether retrying the same insert can succeed later."""
+    # ConnectionFailure covers AutoReconnect, NetworkTimeout and NotPrimaryError
+    if isinstance(error, (ConnectionFailure, ExecutionTimeout, WTimeoutError)):
+        return True
+    if isinstance(error, BulkWriteError):
+        return bool(error.details.get("writeConcernErrors"))
+    return isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError")
+
+
+class OrderWriteBehind:
+    """Acknowledge orders once queued and insert them in batches.
+
+    Orders are appended to an optional local journal before they are
+    acknowledged. The journal is replayed on start (the unique `id` index
+    turns replays of already-written orders into ignored duplicates). After
+    each flushed batch it is truncated if every acknowledged order has
+    reached MongoDB, or rewritten with just the unwritten ones once written
+    orders make up most of it, so it stays bounded under constant load.
+
+    Inserts failing for transient reasons (lost connection, failover, write
+    concern timeout) are retried with backoff. Orders MongoDB rejects
+    outright are moved to the `dead_letter` collection, or only logged and
+    counted without one, so a single bad document cannot stall ingestion.
+    """
+
+    def __init__(self, collection, batch_size=100, flush_interval=0.05,
+                 max_pending=10000, journal_path=None, journal_fsync=True, dead_letter=None, on_written=None):
+        self.collection = collection
+        self.dead_letter = dead_letter
+        # Awaited with the documents each batch inserted
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        self.accepted = 0
+        self.written = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed = 0
+        self.errors = 0
+        self.max_pending = max_pending
+        self._queue = None
+        # order id -> future resolved once the order is in MongoDB
+        self._pending = {}
+        self._pending_docs = {}
+        self._journal = None
+        # Orders in the journal file, written or not
+        self._journal_entries = 0
+        self.journal_compactions = 0
+        self._task = None
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        backlog = []
+        if self.journal_path:
+            # Orders journaled by a previous run are written again before new
+            # ones; the journal keeps them until they reach MongoDB.
+            backlog = self._read_journal()
+            for doc in backlog:
+                self._track(doc)
+            if backlog:
+                logger.info("Replaying %s journaled orders", len(backlog))
+            self._journal = open(self.journal_path, "ab")
+            self._journal_entries = len(backlog)
+        self._task = asyncio.create_task(self._run(backlog))
+
+    async def submit(self, doc):
+        """Queue an order document; returns once it is journaled."""
+        if self._queue.full():
+            self.rejected += 1
+            raise OrderQueueFull()
+        if self._journal is not None:
+            self._journal.write(json_util.dumps(doc).encode() + b"\n")
+            self._journal.flush()
+            self._journal_entries += 1
+        # No await between the capacity check and the put, so this cannot fail
+        self._queue.put_nowait(doc)
+        self._track(doc)
+        self.accepted += 1
+        if self._journal is not None and self.journal_fsync:
+            journal = self._journal
+            try:
+                await asyncio.to_thread(os.fsync, journal.fileno())
+            except OSError:
+                if journal is self._journal:
+                    raise
+                # Compacted meanwhile; the new journal was fsynced with this order in it
+
+    def _track(self, doc):
+        self._pending[doc["id"]] = asyncio.get_running_loop().create_future()
+        self._pending_docs[doc["id"]] = doc
+
+    def pending(self, order_id):
+        """The queued document for an order not yet written, else None."""
+        return self._pending_docs.get(order_id)
+
+    async def wait_written(self, order_id, timeout=5.0):
+        future = self._pending.get(order_id)
+        if future is not None:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _run(self, backlog):
+        for start in range(0, len(backlog), self.batch_size):
+            await self._write_logged(backlog[start:start + self.batch_size])
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write_logged(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_logged(self, batch):
+        # Nothing may end the writer loop, or every order queued after the
+        # error would be acknowledged and never written
+        try:
+            await self._write(batch)
+        except Exception:
+            self.errors += 1
+            logger.exception("Order writer failed on a batch of %s; unwritten orders stay journaled", len(batch))
+
+    async def _write(self, batch):
+        delay = self.flush_interval
+        while True:
+            try:
+                results = await self._insert(batch)
+                break
+            except Exception as e:
+                if not is_transient(e):
+                    # Raised before anything was sent (e.g. a document BSON
+                    # cannot encode): insert one by one to find the culprit
+                    results = await self._insert_each(batch) if len(batch) > 1 else [(batch[0], e)]
+                    break
+                # Acknowledged orders must not be dropped: keep retrying with backoff
+                logger.error("Order batch of %s failed, retrying in %.2fs: %s", len(batch), delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+        failures = [(doc, error) for doc, error in results if error is not None]
+        if failures:
+            await self._dead_letter(failures)
+        self.batches += 1
+        self.written += len(batch) - len(failures)
+        if self.on_written is not None:
+            # Orders inserted by this batch, not replays already in MongoDB
+            skipped = {id(doc) for doc, _ in results}
+            inserted = [doc for doc in batch if id(doc) not in skipped]
+            if inserted:
+                try:
+                    await self.on_written(inserted)
+                except Exception as e:
+                    logger.error("Order writer callback failed for %s orders: %s", len(inserted), e)
+        for doc in batch:
+            self._pending_docs.pop(doc["id"], None)
+            future = self._pending.pop(doc["id"], None)
+            if future is not None and not future.done():
+                future.set_result(None)
+        if self._journal is not None:
+            if not self._pending:
+                self._journal.truncate(0)
+                self._journal_entries = 0
+            elif self._journal_entries >= 2 * len(self._pending) + self.batch_size:
+                await self._compact_journal()
+
+    async def _compact_journal(self):
+        # Rewrite the journal with only the unwritten orders and swap it in
+        snapshot = list(self._pending_docs.values())
+        compacted = self.journal_path + ".compact"
+        await asyncio.to_thread(self._write_journal, compacted, snapshot)
+        # Catch up on orders submitted meanwhile without yielding, so no
+        # submit can append to the old file after this point
+        seen = {doc["id"] for doc in snapshot}
+        missed = [doc for order_id, doc in self._pending_docs.items() if order_id not in seen]
+        self._write_journal(compacted, missed, mode="ab")
+        os.replace(compacted, self.journal_path)
+        journal = open(self.journal_path, "ab")
+        self._journal.close()
+        self._journal = journal
+        self._journal_entries = len(snapshot) + len(missed)
+        self.journal_compactions += 1
+
+    def _write_journal(self, path, docs, mode="wb"):
+        with open(path, mode) as journal:
+            for doc in docs:
+                journal.write(json_util.dumps(doc).encode() + b"\n")
+            journal.flush()
+            if self.journal_fsync:
+                os.fsync(journal.fileno())
+
+    async def _insert(self, docs):
+        # Returns (doc, error) for documents MongoDB rejected, and
+        # (doc, None) for ones it already had
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                raise
+            return [
+                (docs[error["index"]], None if error.get("code") == DUPLICATE_KEY else error.get("errmsg"))
+                for error in e.details.get("writeErrors", [])
+            ]
+        return []
+
+    async def _insert_each(self, docs):
+        results = []
+        for doc in docs:
+            delay = self.flush_interval
+            while True:
+                try:
+                    results.extend(await self._insert([doc]))
+                    break
+                except Exception as e:
+                    if not is_transient(e):
+                        results.append((doc, e))
+                        break
+                    logger.error("Order %s failed, retrying in %.2fs: %s", doc.get("id"), delay, e)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+        return results
+
+    async def _dead_letter(self, failures):
+        self.failed += len(failures)
+        for doc, error in failures:
+            logger.error("Order %s rejected by MongoDB: %s", doc.get("id"), error)
+            if self.dead_letter is None:
+                continue
+            try:
+                await self.dead_letter.insert_one({
+                    "order_id": doc.get("id"),
+                    "document": json_util.dumps(doc),
+                    "error": str(error),
+                    "failed_at": datetime.utcnow(),
+                })
+            except Exception as e:
+                logger.error("Could not dead-letter order %s: %s", doc.get("id"), e)
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return []
+        docs = []
+        with open(self.journal_path, "rb") as journal:
+            for line in journal:
+                if not line.strip():
+                    continue
+                try:
+                    docs.append(json_util.loads(line))
+                except ValueError:
+                    # A torn last line means the order was never acknowledged
+                    logger.warning("Skipping unreadable order journal entry")
+        return docs
+
+    async def stop(self, timeout=10.0):
+        """Flush everything queued, then stop the writer."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Order queue not drained on shutdown; %s orders left in the journal", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "unwritten": len(self._pending),
+            "accepted": self.accepted,
+            "written": self.written,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "errors": self.errors,
+            "journal_compactions": self.journal_compactions,
+        }
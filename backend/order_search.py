@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import logging
+import re
+
+from pymongo import UpdateOne
+
+from text_normalize import digits, is_phone, tokens
+
+logger = logging.getLogger(__name__)
+
+# Shortest phone fragment that can be searched for
+MIN_PHONE_DIGITS = 4
+
+
+def search_terms(customer_name, customer_phone=None):
+    """Terms stored on an order in `search_terms` and matched by prefix.
+
+    Name words are normalized (see text_normalize.normalize). Phone numbers
+    are stored as every digit suffix, so a prefix match on the indexed terms
+    finds any part of the number, with or without a country code.
+    """
+    terms = set(tokens(customer_name or ""))
+    number = digits(customer_phone or "")
+    for start in range(max(len(number) - MIN_PHONE_DIGITS + 1, 1)):
+        if number[start:]:
+            terms.add(number[start:])
+    return sorted(terms)
+
+
+def query_terms(q):
+    if is_phone(q):
+        return [digits(q)]
+    return tokens(q)
+
+
+def search_filter(terms):
+    """Every query term must prefix one of the order's terms."""
+    return {"$and": [{"search_terms": {"$regex": "^" + re.escape(term)}} for term in terms]}
+
+
+def rank(order, terms, q):
+    """Sort key for an order matching a query, best first.
+
+    Exact name or phone matches come first, then names containing every
+    term as a whole word, then names starting with the first term.
+    """
+    words = tokens(order["customer_name"])
+    exact = words == tokens(q) or digits(order.get("customer_phone") or "") == terms[0]
+    whole_words = all(term in words for term in terms)
+    leading = bool(words) and words[0].startswith(terms[0])
+    return (not exact, not whole_words, not leading)
+
+
+async def backfill_search_terms(collection, batch_size=1000):
+    """Set `search_terms` on orders written before order search existed."""
+    updated = 0
+    while True:
+        batch = await collection.find(
+            {"search_terms": {"$exists": False}}, {"_id": 0, "id": 1, "customer_name": 1, "customer_phone": 1}
+        ).to_list(batch_size)
+        if not batch:
+            return updated
+        await collection.bulk_write([
+            UpdateOne(
+                {"id": order["id"]},
+                {"$set": {"search_terms": search_terms(order["customer_name"], order.get("customer_phone"))}},
+            )
+            for order in batch
+        ], ordered=False)
+        updated += len(batch)
+        if len(batch) < batch_size:
+            return updated
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Add search terms to orders created before order search")
+    parser.parse_args()
+    from server import client, db
+
+    try:
+        for name in ("orders", "orders_archive"):
+            updated = await backfill_search_terms(db[name])
+            print(f"{name}: indexed {updated} orders")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
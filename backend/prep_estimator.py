@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+# Orders still waiting for the kitchen; ready orders only wait for pickup
+QUEUED_STATUSES = ("pending", "preparing")
+
+
+class PrepEstimator:
+    """Learned prep times and ready-time estimates for active orders.
+
+    Every order that goes preparing -> ready feeds its prep duration into
+    an exponentially weighted mean per menu item in it, plus an overall
+    mean for items not seen yet. Estimates follow the kitchen's current
+    pace without rescanning order history. Each mean starts from a prior
+    (`default_seconds` overall, the overall mean for a new item) worth
+    `prior_samples` observations, so one odd order cannot set it alone. An order takes as long as its
+    slowest item, and the orders ahead of it are shared out over
+    `stations` orders prepared in parallel.
+    """
+
+    def __init__(self, default_seconds=300.0, stations=2, alpha=0.2, prior_samples=4,
+                 min_seconds=30.0, max_seconds=7200.0):
+        self.default_seconds = default_seconds
+        self.stations = max(1, stations)
+        self.alpha = alpha
+        self.prior_samples = prior_samples
+        # Shorter than this was a status clicked through, not prep time
+        self.min_seconds = min_seconds
+        # Longer than this was a forgotten status change, not prep time
+        self.max_seconds = max_seconds
+        self.observed = 0
+        self.discarded = 0
+        # menu item id -> [mean seconds, samples]
+        self._items = {}
+        self._overall = [default_seconds, 0]
+
+    def observe(self, order):
+        """Learn from an order that just became ready."""
+        if order.status != "ready" or order.preparing_at is None or order.ready_at is None:
+            return
+        seconds = (order.ready_at - order.preparing_at).total_seconds()
+        if not self.min_seconds <= seconds <= self.max_seconds:
+            self.discarded += 1
+            return
+        overall = self._overall[0]
+        for menu_item_id in {item.menu_item_id for item in order.items}:
+            self._update(self._items.setdefault(menu_item_id, [overall, 0]), seconds)
+        self._update(self._overall, seconds)
+        self.observed += 1
+
+    def _update(self, stat, seconds):
+        # A plain mean with the prior while samples are few, then the EWMA
+        stat[1] += 1
+        weight = max(self.alpha, 1.0 / (stat[1] + self.prior_samples))
+        stat[0] += weight * (seconds - stat[0])
+
+    def prep_seconds(self, order):
+        overall = self._overall[0]
+        return max((self._items.get(item.menu_item_id, (overall,))[0] for item in order.items), default=overall)
+
+    def remaining_seconds(self, order, now):
+        prep = self.prep_seconds(order)
+        if order.status == "preparing" and order.preparing_at is not None:
+            return max(0.0, prep - (now - order.preparing_at).total_seconds())
+        return prep
+
+    def estimate(self, order, active_orders, now):
+        """Ready-time estimate for an active order, given every active order."""
+        if order.status not in QUEUED_STATUSES:
+            return {"estimated_ready_at": None, "estimated_wait_seconds": None, "orders_ahead": None}
+        ahead = []
+        if order.status == "pending":
+            # Everything already being prepared, and pending orders placed earlier
+            ahead = [
+                other for other in active_orders
+                if other.id != order.id and (
+                    other.status == "preparing"
+                    or (other.status == "pending" and (other.created_at, other.id) < (order.created_at, order.id))
+                )
+            ]
+        queue = sum(self.remaining_seconds(other, now) for other in ahead) / self.stations
+        wait = queue + self.remaining_seconds(order, now)
+        return {
+            "estimated_ready_at": now + timedelta(seconds=wait),
+            "estimated_wait_seconds": round(wait),
+            "orders_ahead": len(ahead),
+        }
+
+    def queue(self, active_orders, now):
+        """Kitchen backlog: queued orders and the wait a new order would face."""
+        queued = [order for order in active_orders if order.status in QUEUED_STATUSES]
+        wait = sum(self.remaining_seconds(order, now) for order in queued) / self.stations + self._overall[0]
+        return {
+            "pending": sum(order.status == "pending" for order in queued),
+            "preparing": sum(order.status == "preparing" for order in queued),
+            "estimated_wait_seconds": round(wait),
+        }
+
+    def stats(self):
+        return {
+            "observed": self.observed,
+            "discarded": self.discarded,
+            "items": len(self._items),
+            "overall_seconds": round(self._overall[0], 1),
+        }
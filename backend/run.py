@@ -0,0 +1,45 @@
+"""Serve the API with one or more worker processes.
+
+    cd backend
+    python run.py --workers 4 --port 8000
+
+With more than one worker the processes share MongoDB but not memory, so
+CLUSTER_BUS is turned on to keep their menu caches, order boards and order
+streams in step. Each worker has its own Motor connection pool
+(MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE), so MongoDB sees up to
+workers x MONGO_MAX_POOL_SIZE connections.
+"""
+import argparse
+import os
+from pathlib import Path
+
+import uvicorn
+from dotenv import load_dotenv
+
+
+def main():
+    load_dotenv(Path(__file__).parent / '.env')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument("--host", default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT', '8000')))
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        os.environ.setdefault('CLUSTER_BUS', '1')
+        if os.environ.get('ORDER_WRITE_BEHIND', '0') == '1' and os.environ.get('ORDER_JOURNAL', 'default') != '':
+            # Workers would append to and truncate the same journal file
+            raise SystemExit("ORDER_WRITE_BEHIND with several workers needs ORDER_JOURNAL='' (one journal per process is not supported)")
+
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        app_dir=str(Path(__file__).parent),
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
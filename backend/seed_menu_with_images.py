@@ -1,16 +1,6 @@
 import asyncio
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-from pathlib import Path
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from menu_sync import print_report, run_sync
 
 menu_items = [
     # Traditional Coffee
@@ -188,27 +178,15 @@ menu_items = [
 
 async def seed_menu():
     try:
-        # Clear existing menu items
-        await db.menu_items.delete_many({})
-        print("Cleared existing menu items")
-        
-        # Insert new menu items
-        for item in menu_items:
-            # Add required fields
-            import uuid
-            from datetime import datetime
-            item["id"] = str(uuid.uuid4())
-            item["created_at"] = datetime.utcnow()
-            
-            await db.menu_items.insert_one(item)
-            print(f"Added: {item['name']} - {item['image_url'][:50]}...")
-        
-        print(f"\nSuccessfully seeded {len(menu_items)} menu items with images!")
+        # Sync rather than wipe and re-insert, so the menu is never empty while
+        # seeding; prune removes items that are not in the seed list.
+        report = await run_sync(menu_items, prune=True)
+        print_report(report)
+        if not report["errors"]:
+            print(f"\nSuccessfully seeded {len(menu_items)} menu items with images!")
         
     except Exception as e:
         print(f"Error seeding menu: {e}")
-    finally:
-        client.close()
 
 if __name__ == "__main__":
     asyncio.run(seed_menu())
\ No newline at end of file
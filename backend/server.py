@@ -1,15 +1,44 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import List, Optional
+import asyncio
+import base64
+import functools
+import hashlib
+import json
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import analytics
+import order_export
+import order_search
+from admission import AdmissionControl, Overloaded
+from archival import OrderArchiver
+from cluster_bus import GAP, ClusterBus
+from compression import CompressionMiddleware
+from idempotency import IdempotencyInProgress, IdempotencyKeyReused, IdempotencyStore
+from image_cache import ImageCache, ImageFetchError, http_fetcher
+from indexes import IDEMPOTENCY_KEY_TTL_SECONDS, ensure_indexes
+from instrumentation import DbCommandListener, TimedRoute, TimingMiddleware, metrics, track
+from menu_cache import MenuCache
+from menu_search import MenuSearchIndex
+from menu_sync import export_menu, menu_to_csv, parse_menu_csv, parse_menu_json, sync_menu
+from order_board import OrderBoard
+from order_events import CLOSED, RESYNC, OrderEventBroker
+from order_ingest import OrderQueueFull, OrderWriteBehind
+from prep_estimator import PrepEstimator
+from singleflight import SingleFlight
 
 
 ROOT_DIR = Path(__file__).parent
@@ -17,14 +46,36 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# The listener attributes each command's time to the request that issued it.
+# Pool sizes are per process; run.py starts one process per worker.
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    event_listeners=[DbCommandListener()],
+)
 db = client[os.environ['DB_NAME']]
 
+# Opt-in fast JSON path: orjson for every response, and order/status documents
+# returned as stored instead of being rebuilt into models and re-validated.
+# They are only ever written from those models, so they already match them,
+# except for fields added since; those get the model's default (see ORDER_DEFAULTS).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+FAST_JSON = os.environ.get('FAST_JSON', '0') == '1' and orjson is not None
+
+def json_response(content, headers=None) -> Response:
+    if FAST_JSON:
+        return ORJSONResponse(content, headers=headers)
+    return JSONResponse(jsonable_encoder(content), headers=headers)
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse if FAST_JSON else JSONResponse)
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=TimedRoute)
 
 
 # Define Enums
@@ -43,6 +94,21 @@ class OrderStatusEnum(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Allowed status changes; completed and cancelled orders are final
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatusEnum.PENDING: {OrderStatusEnum.PREPARING, OrderStatusEnum.CANCELLED},
+    OrderStatusEnum.PREPARING: {OrderStatusEnum.READY, OrderStatusEnum.CANCELLED},
+    OrderStatusEnum.READY: {OrderStatusEnum.COMPLETED, OrderStatusEnum.CANCELLED},
+    OrderStatusEnum.COMPLETED: set(),
+    OrderStatusEnum.CANCELLED: set(),
+}
+
+# Statuses an order may be in for a change to the given target status
+ORDER_STATUS_SOURCES = {
+    target: [source.value for source, targets in ORDER_STATUS_TRANSITIONS.items() if target in targets]
+    for target in OrderStatusEnum
+}
+
 # Define Models
 class MenuItem(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -82,11 +148,47 @@ class Order(BaseModel):
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # When the kitchen started and finished it; prep-time estimates learn from these
+    preparing_at: Optional[datetime] = None
+    ready_at: Optional[datetime] = None
+
+# An order as returned to customers, with the kitchen's current estimate while active
+class OrderWithEstimate(Order):
+    estimated_ready_at: Optional[datetime] = None
+    estimated_wait_seconds: Optional[int] = None
+    orders_ahead: Optional[int] = None
+
+class KitchenQueue(BaseModel):
+    pending: int
+    preparing: int
+    estimated_wait_seconds: int
+
+# Row of the order list's summary view; full orders come from GET /orders/{order_id}
+class OrderSummary(BaseModel):
+    id: str
+    customer_name: str
+    total_amount: float
+    status: OrderStatusEnum
+    item_count: int
+    created_at: datetime
+    updated_at: datetime
+
+class ActiveOrders(BaseModel):
+    pending: List[Order]
+    preparing: List[Order]
+    ready: List[Order]
+
+class OrderItemCreate(BaseModel):
+    menu_item_id: str
+    quantity: int = Field(gt=0)
+    # Accepted for older clients but ignored; prices and names come from the menu
+    price: Optional[float] = None
+    name: Optional[str] = None
 
 class OrderCreate(BaseModel):
     customer_name: str
     customer_phone: Optional[str] = None
-    items: List[OrderItem]
+    items: List[OrderItemCreate] = Field(min_length=1)
     notes: Optional[str] = None
 
 class StatusCheck(BaseModel):
@@ -97,6 +199,212 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+def stored_defaults(model) -> dict:
+    # Defaults for the fields documents written before they existed may lack
+    return {
+        name: field.default for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
+
+ORDER_DEFAULTS = stored_defaults(Order)
+
+# Field subsets served by `?view=` on list endpoints; `?fields=` picks any subset
+MENU_VIEWS = {"summary": {"id", "name", "name_ar", "price", "category", "image_url", "available"}}
+ORDER_SUMMARY_FIELDS = list(OrderSummary.model_fields)
+ORDER_LIST_FIELDS = set(Order.model_fields) | {"item_count"}
+order_summaries = TypeAdapter(List[OrderSummary])
+
+def parse_fields(fields: str, allowed) -> set:
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown)) or fields}")
+    return requested
+
+# Concurrent identical reads share one in-flight query; SINGLE_FLIGHT=0 is for benchmarks
+SINGLE_FLIGHT = os.environ.get('SINGLE_FLIGHT', '1') == '1'
+
+# In-process menu cache, invalidated through the `cache_versions` counter
+menu_cache = MenuCache(
+    db,
+    MenuItem,
+    poll_interval=float(os.environ.get('MENU_CACHE_POLL_SECONDS', '5')),
+    views=MENU_VIEWS,
+    single_flight=SINGLE_FLIGHT,
+)
+# Typeahead over the cached menu; follows each snapshot, re-indexing changed items only
+menu_search = MenuSearchIndex()
+MENU_CACHE_CONTROL = f"public, max-age={int(os.environ.get('MENU_MAX_AGE', '30'))}, must-revalidate"
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def menu_response(request: Request, body) -> Response:
+    headers = {"ETag": body.etag, "Cache-Control": MENU_CACHE_CONTROL}
+    if etag_matches(request, body.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body.content, media_type="application/json", headers=headers)
+
+# Live order changes pushed to admin dashboards over server-sent events
+order_events = OrderEventBroker(
+    history=int(os.environ.get('ORDER_EVENTS_HISTORY', '1000')),
+    queue_size=int(os.environ.get('ORDER_EVENTS_QUEUE_SIZE', '256')),
+)
+ORDER_STREAM_HEARTBEAT_SECONDS = 15
+
+# Hourly sales rollups, updated after each order is committed; failures are
+# counted and repaired by `python analytics.py`
+rollups = analytics.RollupRecorder(db)
+
+# Optional write-behind ingestion: orders are acknowledged once journaled and
+# queued, then inserted in batches. Set ORDER_JOURNAL="" to skip the journal.
+# Their rollups are updated per batch, once they are in MongoDB.
+order_writer = None
+if os.environ.get('ORDER_WRITE_BEHIND', '0') == '1':
+    order_writer = OrderWriteBehind(
+        db.orders,
+        batch_size=int(os.environ.get('ORDER_BATCH_SIZE', '100')),
+        flush_interval=int(os.environ.get('ORDER_FLUSH_MS', '50')) / 1000,
+        max_pending=int(os.environ.get('ORDER_QUEUE_MAX', '10000')),
+        journal_path=os.environ.get('ORDER_JOURNAL', str(ROOT_DIR / 'order_journal.jsonl')) or None,
+        journal_fsync=os.environ.get('ORDER_JOURNAL_FSYNC', '1') == '1',
+        dead_letter=db.orders_dead_letter,
+        on_written=rollups.orders_created,
+    )
+
+# Resized menu images, fetched from their image_url once and kept on disk
+image_cache = ImageCache(
+    os.environ.get('IMAGE_CACHE_DIR', str(ROOT_DIR / 'image_cache')),
+    fetcher=functools.partial(http_fetcher, max_bytes=int(os.environ.get('IMAGE_MAX_MB', '10')) * 1024 * 1024),
+    max_bytes=int(os.environ.get('IMAGE_CACHE_MB', '200')) * 1024 * 1024,
+)
+IMAGE_CACHE_CONTROL = "public, max-age=86400"
+
+# Customers polling the same order's status share one lookup; writes to the
+# order make later reads start a new one (see order_changed)
+order_reads = SingleFlight(enabled=SINGLE_FLIGHT)
+
+# Active orders for the kitchen, served from memory
+order_board = OrderBoard(db.orders, Order)
+
+# Prep times learned from status changes, for ready-time estimates
+prep_estimator = PrepEstimator(
+    default_seconds=float(os.environ.get('PREP_DEFAULT_SECONDS', '300')),
+    stations=int(os.environ.get('KITCHEN_STATIONS', '2')),
+)
+
+def order_estimate(order_id: str) -> dict:
+    # Every active order is on the kitchen board, so estimates need no query
+    order = order_board.get(order_id)
+    if order is None:
+        return {"estimated_ready_at": None, "estimated_wait_seconds": None, "orders_ahead": None}
+    return prep_estimator.estimate(order, order_board.orders(), datetime.utcnow())
+
+# Idempotency-Key support for POST /orders: retried submissions replay the
+# original order instead of inserting a duplicate
+order_idempotency = IdempotencyStore(
+    db.idempotency_keys,
+    cache_size=int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000')),
+    ttl=IDEMPOTENCY_KEY_TTL_SECONDS,
+)
+
+# Finished orders move to `orders_archive` after this many days; reads fall back to it
+ORDER_ARCHIVE_AFTER_DAYS = float(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', '30'))
+order_archiver = None
+if ORDER_ARCHIVE_AFTER_DAYS > 0:
+    order_archiver = OrderArchiver(
+        db,
+        older_than=timedelta(days=ORDER_ARCHIVE_AFTER_DAYS),
+        interval=float(os.environ.get('ORDER_ARCHIVE_INTERVAL_SECONDS', '3600')),
+    )
+
+# With several worker processes (run.py --workers N) each keeps its own menu
+# cache, order board and event stream; the cluster bus carries menu
+# invalidations and order changes between them.
+cluster_bus = ClusterBus(db) if os.environ.get('CLUSTER_BUS', '0') == '1' else None
+
+async def menu_changed():
+    await menu_cache.mark_changed()
+    if cluster_bus is not None:
+        await cluster_bus.publish("menu.changed")
+
+async def order_changed(event_type: str, order: Order):
+    # A read started before this write must not be shared with later callers
+    order_reads.forget(order.id)
+    order_board.apply(order)
+    prep_estimator.observe(order)
+    order_events.publish(event_type, order.model_dump_json())
+    if cluster_bus is not None:
+        await cluster_bus.publish(event_type, order.dict())
+
+async def apply_remote_menu_change(_):
+    menu_cache.invalidate()
+
+async def apply_remote_order_change(event_type: str, data: dict):
+    order = Order(**data)
+    order_reads.forget(order.id)
+    order_board.apply(order)
+    prep_estimator.observe(order)
+    order_events.publish(event_type, order.model_dump_json())
+
+async def resync_after_gap(_):
+    # Changes from other workers may have been missed: reload from MongoDB
+    menu_cache.invalidate()
+    await order_board.load()
+    order_events.resync_all()
+
+if cluster_bus is not None:
+    cluster_bus.on("menu.changed", apply_remote_menu_change)
+    for event_type in ("order.created", "order.updated"):
+        cluster_bus.on(event_type, functools.partial(apply_remote_order_change, event_type))
+    cluster_bus.on(GAP, resync_after_gap)
+
+# Admission control for routes that wait on MongoDB: when it slows down,
+# requests queue (order creation first) and beyond that get a fast 503
+# instead of piling up in the event loop. ADMISSION_CAPACITY=0 disables it.
+ADMISSION_PRIORITIES = {
+    "create_order": 0, "update_order": 1, "read_order": 1,
+    "list_orders": 2, "search_orders": 2, "analytics": 3, "status": 3,
+}
+ADMISSION_LIMITS = {"list_orders": 16, "search_orders": 8, "analytics": 4, "status": 4}
+
+def parse_admission_limits(value: str) -> dict:
+    # "route=n,route=n" on top of the defaults
+    limits = dict(ADMISSION_LIMITS)
+    for part in value.split(","):
+        if part.strip():
+            route, _, limit = part.partition("=")
+            limits[route.strip()] = int(limit)
+    return limits
+
+admission = AdmissionControl(
+    capacity=int(os.environ.get('ADMISSION_CAPACITY', '64')),
+    queue_size=int(os.environ.get('ADMISSION_QUEUE_SIZE', '256')),
+    wait_timeout=float(os.environ.get('ADMISSION_WAIT_SECONDS', '2')),
+    limits=parse_admission_limits(os.environ.get('ADMISSION_LIMITS', '')),
+    priorities=ADMISSION_PRIORITIES,
+)
+
+def admit(route: str):
+    async def hold_slot():
+        if admission.capacity <= 0:
+            yield
+            return
+        try:
+            await admission.acquire(route)
+        except Overloaded:
+            raise HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
+        try:
+            yield
+        finally:
+            admission.release(route)
+    return Depends(hold_slot)
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -108,101 +416,542 @@ async def create_menu_item(item: MenuItemCreate):
     item_dict = item.dict()
     menu_item = MenuItem(**item_dict)
     await db.menu_items.insert_one(menu_item.dict())
+    await menu_changed()
+    menu_search.upsert(menu_item)
     return menu_item
 
+def menu_body(snapshot, category, view: str, fields: Optional[str]):
+    if fields:
+        return snapshot.render(category, parse_fields(fields, MenuItem.model_fields) | {"id"})
+    return snapshot.body(category, None if view == "full" else view)
+
 @api_router.get("/menu", response_model=List[MenuItem])
-async def get_menu():
-    menu_items = await db.menu_items.find({"available": True}).to_list(1000)
-    return [MenuItem(**item) for item in menu_items]
+async def get_menu(
+    request: Request, view: str = Query("full", pattern="^(full|summary)$"), fields: Optional[str] = None
+):
+    snapshot = await menu_cache.get()
+    return menu_response(request, menu_body(snapshot, None, view, fields))
 
 @api_router.get("/menu/category/{category}", response_model=List[MenuItem])
-async def get_menu_by_category(category: CategoryEnum):
-    menu_items = await db.menu_items.find({"category": category, "available": True}).to_list(1000)
-    return [MenuItem(**item) for item in menu_items]
+async def get_menu_by_category(
+    category: CategoryEnum, request: Request,
+    view: str = Query("full", pattern="^(full|summary)$"), fields: Optional[str] = None,
+):
+    snapshot = await menu_cache.get()
+    return menu_response(request, menu_body(snapshot, category, view, fields))
+
+@api_router.post("/menu/bulk")
+async def bulk_sync_menu(request: Request, prune: bool = False, dry_run: bool = False):
+    # JSON array or CSV with a header row; only differences are written, in one bulk_write
+    body = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            records = parse_menu_csv(body)
+        else:
+            records = parse_menu_json(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse menu import: {e}")
+    report = await sync_menu(db, records, MenuItemCreate, MenuItem, prune=prune, dry_run=dry_run)
+    if report["applied"]:
+        await menu_changed()
+    if report["errors"]:
+        return Response(content=json.dumps(report, ensure_ascii=False), status_code=422, media_type="application/json")
+    return report
+
+@api_router.get("/menu/export")
+async def export_menu_items(format: str = Query("json", pattern="^(json|csv)$")):
+    records = await export_menu(db)
+    if format == "csv":
+        return Response(
+            content=menu_to_csv(records),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="menu.csv"'},
+        )
+    return records
+
+@api_router.get("/images/{item_id}")
+async def get_menu_image(item_id: str, w: int = Query(320, ge=16, le=2048)):
+    # Width is rounded up to one of image_cache.IMAGE_WIDTHS
+    snapshot = await menu_cache.get()
+    item = snapshot.items.get(item_id)
+    if item is None or not item.image_url:
+        raise HTTPException(status_code=404, detail="Image not found")
+    try:
+        path, media_type = await image_cache.get(item.image_url, w)
+    except (ImageFetchError, OSError) as e:
+        logger.warning(f"Image for menu item {item_id} unavailable: {e}")
+        raise HTTPException(status_code=502, detail="Image could not be loaded")
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": IMAGE_CACHE_CONTROL})
+
+@api_router.get("/menu/search", response_model=List[MenuItem])
+async def search_menu(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(20, ge=1, le=100)):
+    # Prefix match on normalized English and Arabic words, names ranked first
+    snapshot = await menu_cache.get()
+    menu_search.sync(snapshot)
+    return Response(content=menu_search.body(q, limit), media_type="application/json")
+
+@api_router.get("/menu/cache/stats")
+async def get_menu_cache_stats():
+    return menu_cache.stats()
 
 @api_router.get("/menu/{item_id}", response_model=MenuItem)
 async def get_menu_item(item_id: str):
-    item = await db.menu_items.find_one({"id": item_id})
+    snapshot = await menu_cache.get()
+    item = snapshot.items.get(item_id)
     if not item:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Menu item not found")
-    return MenuItem(**item)
+    return item
 
 @api_router.put("/menu/{item_id}", response_model=MenuItem)
 async def update_menu_item(item_id: str, item_update: MenuItemCreate):
-    from fastapi import HTTPException
-    existing_item = await db.menu_items.find_one({"id": item_id})
-    if not existing_item:
-        raise HTTPException(status_code=404, detail="Menu item not found")
-    
     update_dict = item_update.dict()
-    await db.menu_items.update_one({"id": item_id}, {"$set": update_dict})
-    
-    updated_item = await db.menu_items.find_one({"id": item_id})
-    return MenuItem(**updated_item)
+    updated_item = await db.menu_items.find_one_and_update(
+        {"id": item_id},
+        {"$set": update_dict},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not updated_item:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    await menu_changed()
+    menu_item = MenuItem(**updated_item)
+    menu_search.upsert(menu_item)
+    return menu_item
 
 # Order endpoints
-@api_router.post("/orders", response_model=Order)
-async def create_order(order: OrderCreate):
+def price_order_items(snapshot, requested: List[OrderItemCreate]) -> List[OrderItem]:
+    # Price and name every line from the cached menu; nothing the client sent is trusted
+    items = []
+    problems = []
+    for item in requested:
+        entry = snapshot.prices.get(item.menu_item_id)
+        if entry is None:
+            problems.append(f"Unknown menu item: {item.menu_item_id}")
+        elif not entry.available:
+            problems.append(f"{entry.name} is currently unavailable")
+        else:
+            items.append(OrderItem(
+                menu_item_id=item.menu_item_id, quantity=item.quantity, price=entry.price, name=entry.name
+            ))
+    if problems:
+        raise HTTPException(status_code=422, detail=problems)
+    return items
+
+@api_router.post("/orders", response_model=OrderWithEstimate, dependencies=[admit("create_order")])
+async def create_order(order: OrderCreate, idempotency_key: Optional[str] = Header(None, max_length=255)):
+    if idempotency_key is None:
+        new_order = await place_order(order)
+        return OrderWithEstimate(**new_order.dict(), **order_estimate(new_order.id))
+
+    async def place(order_id):
+        return (await place_order(order, order_id)).dict()
+
+    fingerprint = hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+    try:
+        stored = await order_idempotency.run(f"orders:{idempotency_key}", fingerprint, place, placed_order)
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different order")
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=409, detail="An order with this Idempotency-Key is still being placed", headers={"Retry-After": "1"}
+        )
+    return OrderWithEstimate(**stored, **order_estimate(stored["id"]))
+
+async def place_order(order: OrderCreate, order_id: Optional[str] = None) -> Order:
+    snapshot = await menu_cache.get()
+    items = price_order_items(snapshot, order.items)
     order_dict = order.dict()
-    total_amount = sum(item.price * item.quantity for item in order.items)
-    order_dict["total_amount"] = total_amount
+    order_dict["items"] = items
+    order_dict["total_amount"] = round(sum(item.price * item.quantity for item in items), 2)
+    if order_id is not None:
+        order_dict["id"] = order_id
     
     new_order = Order(**order_dict)
-    await db.orders.insert_one(new_order.dict())
+    document = new_order.dict()
+    document["search_terms"] = order_search.search_terms(new_order.customer_name, new_order.customer_phone)
+    if order_writer is not None:
+        try:
+            await order_writer.submit(document)
+        except OrderQueueFull:
+            raise HTTPException(
+                status_code=503, detail="Too many orders right now, please retry", headers={"Retry-After": "1"}
+            )
+    else:
+        await db.orders.insert_one(document)
+    await order_changed("order.created", new_order)
+    if order_writer is None:
+        await rollups.order_created(new_order.dict())
     return new_order
 
-@api_router.get("/orders", response_model=List[Order])
-async def get_orders():
-    orders = await db.orders.find().sort("created_at", -1).to_list(1000)
-    return [Order(**order) for order in orders]
+async def placed_order(order_id: str) -> Optional[dict]:
+    # An order placed under an idempotency claim that has no stored result
+    order = order_writer.pending(order_id) if order_writer is not None else None
+    if order is not None:
+        return {key: value for key, value in order.items() if key not in ORDER_PROJECTION}
+    return await find_order(order_id)
+
+# Keyset pagination over (created_at, id), or (updated_at, id) in updated_since mode.
+# The cursor is opaque to clients: urlsafe base64 of [sort field, value, id].
+def encode_order_cursor(field: str, order: dict) -> str:
+    raw = json.dumps([field, order[field].isoformat(), order["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_order_cursor(cursor: str, field: str):
+    try:
+        cursor_field, value, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_field != field:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested ordering")
+    return value, order_id
+
+# Stored order documents minus internal fields, for responses built from raw documents
+ORDER_PROJECTION = {"_id": 0, "search_terms": 0}
+# Orders per database round trip and per streamed chunk of GET /orders/export
+ORDER_EXPORT_BATCH_SIZE = int(os.environ.get('ORDER_EXPORT_BATCH_SIZE', '500'))
+# Newest matches ranked by GET /orders/search; older ones need a more specific query
+ORDER_SEARCH_CANDIDATES = 200
+
+def order_projection(fields, sort_field: str) -> dict:
+    # id and the sort field are always returned; the cursor is built from them
+    projection = {"_id": 0, "id": 1, sort_field: 1}
+    for name in fields:
+        projection[name] = {"$size": "$items"} if name == "item_count" else 1
+    return projection
+
+@api_router.get("/orders", response_model=List[Order], dependencies=[admit("list_orders")])
+async def get_orders(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    status: Optional[List[OrderStatusEnum]] = Query(None),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    updated_since: Optional[datetime] = None,
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = None,
+    archived: bool = False,
+):
+    collection = db.orders_archive if archived else db.orders
+    filters = []
+    if status:
+        filters.append({"status": {"$in": status}})
+    if created_from or created_to:
+        created_range = {}
+        if created_from:
+            created_range["$gte"] = created_from
+        if created_to:
+            created_range["$lt"] = created_to
+        filters.append({"created_at": created_range})
+
+    # Newest first by default; oldest change first when syncing from updated_since
+    if updated_since:
+        field, direction, op = "updated_at", 1, "$gt"
+        filters.append({"updated_at": {"$gt": updated_since}})
+    else:
+        field, direction, op = "created_at", -1, "$lt"
+    if after:
+        value, order_id = decode_order_cursor(after, field)
+        filters.append({"$or": [
+            {field: {op: value}},
+            {field: value, "id": {op: order_id}},
+        ]})
+
+    if view == "summary":
+        selected = ORDER_SUMMARY_FIELDS
+    elif fields:
+        selected = parse_fields(fields, ORDER_LIST_FIELDS)
+    else:
+        selected = None
+
+    query = {"$and": filters} if filters else {}
+    if selected is None:
+        orders = await collection.find(query, ORDER_PROJECTION).sort(
+            [(field, direction), ("id", direction)]
+        ).limit(limit + 1).to_list(limit + 1)
+    else:
+        # Computed fields like item_count need $project, so slim reads use a pipeline
+        orders = await collection.aggregate([
+            {"$match": query},
+            {"$sort": {field: direction, "id": direction}},
+            {"$limit": limit + 1},
+            {"$project": order_projection(selected, field)},
+        ]).to_list(None)
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_order_cursor(field, orders[-1])
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if selected is None:
+        if FAST_JSON:
+            with track("serialization"):
+                return json_response([{**ORDER_DEFAULTS, **order} for order in orders], headers)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        with track("validation"):
+            return [Order(**order) for order in orders]
+    if view == "summary":
+        with track("validation"):
+            summaries = order_summaries.validate_python(orders)
+        with track("serialization"):
+            content = order_summaries.dump_json(summaries)
+        return Response(content=content, media_type="application/json", headers=headers)
+    defaults = {name: ORDER_DEFAULTS[name] for name in selected if name in ORDER_DEFAULTS}
+    with track("serialization"):
+        return json_response([{**defaults, **order} for order in orders], headers)
+
+@api_router.get("/orders/active", response_model=ActiveOrders)
+async def get_active_orders():
+    # Pending, preparing and ready orders, oldest first, without a query
+    return Response(content=await order_board.body(), media_type="application/json")
+
+@api_router.get("/orders/queue", response_model=KitchenQueue)
+async def get_kitchen_queue():
+    # How far behind the kitchen is: what a new order would wait right now
+    return prep_estimator.queue(order_board.orders(), datetime.utcnow())
+
+@api_router.get("/orders/search", response_model=List[Order], dependencies=[admit("search_orders")])
+async def search_orders(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    archived: bool = False,
+):
+    # Prefix match on the indexed `search_terms`, newest candidates first, then
+    # ranked: exact name or phone, whole words, prefixes
+    terms = order_search.query_terms(q)
+    if not terms:
+        return []
+    collection = db.orders_archive if archived else db.orders
+    candidates = await collection.find(order_search.search_filter(terms), ORDER_PROJECTION).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(ORDER_SEARCH_CANDIDATES).to_list(ORDER_SEARCH_CANDIDATES)
+    ranked = sorted(candidates, key=lambda order: order_search.rank(order, terms, q))[:limit]
+    if FAST_JSON:
+        with track("serialization"):
+            return json_response([{**ORDER_DEFAULTS, **order} for order in ranked])
+    with track("validation"):
+        return [Order(**order) for order in ranked]
 
-@api_router.get("/orders/{order_id}", response_model=Order)
+@api_router.get("/orders/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    status: Optional[List[OrderStatusEnum]] = Query(None),
+    archived: bool = False,
+    batch_size: int = Query(ORDER_EXPORT_BATCH_SIZE, ge=1, le=10000),
+):
+    # Streamed from the cursor one batch at a time, oldest first, so memory
+    # stays flat for any range and the first rows go out immediately
+    query = {}
+    if status:
+        query["status"] = {"$in": status}
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+    collection = db.orders_archive if archived else db.orders
+    cursor = collection.find(query, ORDER_PROJECTION).sort([("created_at", 1), ("id", 1)]).batch_size(batch_size)
+    if format == "csv":
+        body, media_type = order_export.stream_csv(cursor, batch_size), "text/csv; charset=utf-8"
+    else:
+        body, media_type = order_export.stream_ndjson(cursor, batch_size), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
+
+@api_router.get("/orders/stream")
+async def stream_orders(request: Request, last_event_id: Optional[str] = None):
+    # EventSource sends Last-Event-ID on reconnect; the query param covers first connects
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    subscription = order_events.subscribe(resume_from)
+
+    async def event_stream():
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), timeout=ORDER_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is CLOSED:
+                    break
+                yield order_events.resync_frame() if event is RESYNC else event.frame
+        finally:
+            order_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def find_order(order_id: str) -> Optional[dict]:
+    order = await db.orders.find_one({"id": order_id}, ORDER_PROJECTION)
+    if order is None:
+        order = await db.orders_archive.find_one({"id": order_id}, ORDER_PROJECTION)
+    return order
+
+@api_router.get("/orders/{order_id}", response_model=OrderWithEstimate, dependencies=[admit("read_order")])
 async def get_order(order_id: str):
-    from fastapi import HTTPException
-    order = await db.orders.find_one({"id": order_id})
+    # Acknowledged orders still waiting in the write-behind queue are readable too
+    order = order_writer.pending(order_id) if order_writer is not None else None
+    if order is not None:
+        # Queued documents still carry search_terms; the model drops them
+        return OrderWithEstimate(**order, **order_estimate(order_id))
+    order = await order_reads.do(order_id, functools.partial(find_order, order_id))
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return Order(**order)
+    estimate = order_estimate(order_id)
+    if FAST_JSON:
+        return json_response({**ORDER_DEFAULTS, **order, **estimate})
+    return OrderWithEstimate(**order, **estimate)
 
-@api_router.patch("/orders/{order_id}/status")
-async def update_order_status(order_id: str, status: OrderStatusEnum):
-    from fastapi import HTTPException
-    order = await db.orders.find_one({"id": order_id})
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    await db.orders.update_one(
-        {"id": order_id}, 
-        {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+@api_router.patch("/orders/{order_id}/status", dependencies=[admit("update_order")])
+async def update_order_status(
+    order_id: str, status: OrderStatusEnum, expected_status: Optional[OrderStatusEnum] = None
+):
+    # The transition check lives in the filter, so the read and the write are one
+    # atomic round trip; a concurrent change makes the filter miss instead of
+    # being overwritten. expected_status pins the status the client last saw.
+    if order_writer is not None and order_writer.pending(order_id):
+        try:
+            await order_writer.wait_written(order_id)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503, detail="Order is not saved yet, please retry", headers={"Retry-After": "1"}
+            )
+    allowed = ORDER_STATUS_SOURCES[status]
+    if expected_status is not None:
+        allowed = [s for s in allowed if s == expected_status.value]
+    now = datetime.utcnow()
+    changes = {"status": status.value, "updated_at": now}
+    if status in (OrderStatusEnum.PREPARING, OrderStatusEnum.READY):
+        changes[f"{status.value}_at"] = now
+    updated = await db.orders.find_one_and_update(
+        {"id": order_id, "status": {"$in": allowed}},
+        {"$set": changes},
+        projection=ORDER_PROJECTION,
+        return_document=ReturnDocument.AFTER,
     )
-    
-    updated_order = await db.orders.find_one({"id": order_id})
-    return Order(**updated_order)
+    if not updated:
+        # Only the failure path pays for a second read, to tell 404 from 409
+        current = await db.orders.find_one({"id": order_id}, {"_id": 0, "status": 1})
+        if not current:
+            # Archived orders are finished, so any change is a conflict
+            current = await db.orders_archive.find_one({"id": order_id}, {"_id": 0, "status": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Order not found")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Cannot change order status from {current['status']} to {status.value}",
+        )
+
+    updated_order = Order(**updated)
+    await order_changed("order.updated", updated_order)
+    if status == OrderStatusEnum.CANCELLED:
+        await rollups.order_cancelled(updated)
+    return updated_order
+
+# Analytics endpoints, answered from hourly rollups rather than raw orders
+ANALYTICS_TIMEZONE = os.environ.get('ANALYTICS_TIMEZONE', 'UTC')
 
-@api_router.post("/status", response_model=StatusCheck)
+def analytics_window(start: Optional[date], end: Optional[date], tz: Optional[str]):
+    try:
+        zone = ZoneInfo(tz or ANALYTICS_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+    end = end or datetime.now(zone).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return zone, analytics.utc_range(start, end, zone)
+
+@api_router.get("/analytics/summary", dependencies=[admit("analytics")])
+async def get_sales_summary(start: Optional[date] = None, end: Optional[date] = None, tz: Optional[str] = None):
+    _, (range_from, range_to) = analytics_window(start, end, tz)
+    return analytics.sales_summary(await analytics.load_rollups(db, range_from, range_to))
+
+@api_router.get("/analytics/daily", dependencies=[admit("analytics")])
+async def get_daily_sales(start: Optional[date] = None, end: Optional[date] = None, tz: Optional[str] = None):
+    zone, (range_from, range_to) = analytics_window(start, end, tz)
+    return analytics.daily_sales(await analytics.load_rollups(db, range_from, range_to), zone)
+
+@api_router.get("/analytics/top-items", dependencies=[admit("analytics")])
+async def get_top_items(
+    start: Optional[date] = None, end: Optional[date] = None, tz: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+):
+    _, (range_from, range_to) = analytics_window(start, end, tz)
+    return analytics.top_items(await analytics.load_rollups(db, range_from, range_to), limit)
+
+@api_router.post("/status", response_model=StatusCheck, dependencies=[admit("status")])
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
     _ = await db.status_checks.insert_one(status_obj.dict())
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+@api_router.get("/status", response_model=List[StatusCheck], dependencies=[admit("status")])
+async def get_status_checks(limit: int = Query(100, ge=1, le=1000)):
+    # Newest first; the TTL index on timestamp serves the sort and expires old checks
+    status_checks = await db.status_checks.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit).to_list(limit)
+    if FAST_JSON:
+        return json_response(status_checks)
+    with track("validation"):
+        return [StatusCheck(**status_check) for status_check in status_checks]
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint: per-route latency with db/validation/serialization
+# breakdown, MongoDB command totals and component stats
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    stats = {
+        "menu_cache": menu_cache.stats(),
+        "order_events": order_events.stats(),
+        "idempotency": order_idempotency.stats(),
+        "order_board": order_board.stats(),
+        "image_cache": image_cache.stats(),
+        "admission": admission.stats(),
+        "order_reads": order_reads.stats(),
+        "menu_search": menu_search.stats(),
+        "prep_estimator": prep_estimator.stats(),
+        "rollups": rollups.stats(),
+    }
+    if order_writer is not None:
+        stats["order_writer"] = order_writer.stats()
+    if order_archiver is not None:
+        stats["order_archiver"] = order_archiver.stats()
+    if cluster_bus is not None:
+        stats["cluster_bus"] = cluster_bus.stats()
+    return metrics.render(stats)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+if os.environ.get('COMPRESSION', '1') == '1':
+    app.add_middleware(CompressionMiddleware, minimum_size=int(os.environ.get('COMPRESS_MIN_BYTES', '1024')))
+
+# Outermost, so CORS and compression count towards the request time
+app.add_middleware(TimingMiddleware, server_timing=os.environ.get('SERVER_TIMING', '0') == '1')
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -210,6 +959,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    if os.environ.get('ENSURE_INDEXES', '1') == '1':
+        try:
+            await ensure_indexes(db)
+        except Exception as e:
+            logger.error(f"Index check failed: {e}")
+
+@app.on_event("startup")
+async def load_order_board():
+    try:
+        await order_board.load()
+    except Exception as e:
+        # GET /orders/active retries the load on first use
+        logger.error(f"Order board load failed: {e}")
+
+@app.on_event("startup")
+async def start_cluster_bus():
+    if cluster_bus is not None:
+        await cluster_bus.start()
+
+@app.on_event("startup")
+async def start_menu_cache():
+    menu_cache.start()
+
+@app.on_event("startup")
+async def start_order_writer():
+    if order_writer is not None:
+        await order_writer.start()
+
+@app.on_event("startup")
+async def start_order_archiver():
+    if order_archiver is not None:
+        order_archiver.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    order_events.close()
+    if cluster_bus is not None:
+        await cluster_bus.stop()
+    await menu_cache.stop()
+    if order_archiver is not None:
+        await order_archiver.stop()
+    if order_writer is not None:
+        # Drain acknowledged orders before the connection goes away
+        await order_writer.stop()
     client.close()
@@ -0,0 +1,49 @@
+import asyncio
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight call.
+
+    The first caller for a key starts `fn()`; callers arriving before it
+    finishes await the same task and get the same result or exception.
+    Nothing is cached after it completes. Shared results are the same
+    object for every caller, so they must be treated as read-only.
+    A caller being cancelled does not cancel the call for the others.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.calls = 0
+        self.shared = 0
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        if not self.enabled:
+            self.calls += 1
+            return await fn()
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def forget(self, key):
+        """Make later calls for `key` start afresh, e.g. after a write.
+
+        Callers already waiting keep the in-flight result.
+        """
+        self._inflight.pop(key, None)
+
+    def _finished(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Every caller may have gone away; don't log the failure as unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {"calls": self.calls, "shared": self.shared, "inflight": len(self._inflight)}
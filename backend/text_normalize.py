@@ -0,0 +1,46 @@
+import re
+import unicodedata
+
+# Letters written several ways in Arabic names; NFKD already splits hamza and
+# madda off alef, waw and yeh, these have no decomposition.
+ARABIC_FOLDS = str.maketrans({
+    "ٱ": "ا",  # alef wasla -> alef
+    "ى": "ي",  # alef maksura -> yeh
+    "ة": "ه",  # teh marbuta -> heh
+    "ـ": None,      # tatweel
+})
+# Arabic-Indic and Persian digits
+DIGIT_FOLDS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "0123456789" * 2)
+
+WORD = re.compile(r"\w+")
+PHONE = re.compile(r"^[\d\s()+\-.]+$")
+
+
+def normalize(text):
+    """Fold case, accents, Arabic diacritics and letter variants, and digits.
+
+    "Ahméd" and "ahmed" normalize alike, as do "أحمد", "احمد" and "أَحْمَد".
+    """
+    text = unicodedata.normalize("NFKD", text.translate(DIGIT_FOLDS))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return text.translate(ARABIC_FOLDS).casefold()
+
+
+def tokens(text):
+    return WORD.findall(normalize(text))
+
+
+def strip_article(word):
+    """Drop the Arabic definite article, so "الحليب" also matches "حليب"."""
+    if word.startswith("ال") and len(word) > 4:
+        return word[2:]
+    return word
+
+
+def digits(text):
+    return "".join(char for char in text.translate(DIGIT_FOLDS) if char.isdigit())
+
+
+def is_phone(text):
+    """True for input that reads as a phone number, like "+20 100-123"."""
+    return bool(PHONE.match(text.translate(DIGIT_FOLDS))) and len(digits(text)) >= 3
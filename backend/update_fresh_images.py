@@ -1,16 +1,6 @@
 import asyncio
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-from pathlib import Path
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from menu_sync import print_report, run_sync
 
 # Fresh menu item image mappings with new URLs
 fresh_menu_images = {
@@ -35,37 +25,16 @@ fresh_menu_images = {
 async def update_fresh_images():
     try:
         print("🎨 Updating menu items with fresh images...")
-        updated_count = 0
-        
-        for name, image_url in fresh_menu_images.items():
-            # Update the image URL for this menu item
-            result = await db.menu_items.update_one(
-                {"name": name},
-                {"$set": {"image_url": image_url}}
-            )
-            
-            if result.modified_count > 0:
-                print(f"✅ Updated fresh image for: {name}")
-                updated_count += 1
-            else:
-                print(f"❌ Failed to update: {name} (item may not exist)")
-        
-        print(f"\n🎉 Successfully updated {updated_count} menu items with fresh images!")
-        
-        # Verify all updates
-        menu_items = await db.menu_items.find().to_list(1000)
-        items_with_images = [item for item in menu_items if item.get('image_url')]
-        print(f"📸 Total items with images: {len(items_with_images)}/{len(menu_items)}")
-        
-        # Test a few image URLs
-        print(f"\n🔍 Sample image URLs:")
-        for i, item in enumerate(menu_items[:3]):
-            print(f"  {i+1}. {item['name']}: {item.get('image_url', 'NO IMAGE')}")
+        # One bulk_write for every image that actually changed
+        report = await run_sync(
+            [{"name": name, "image_url": image_url} for name, image_url in fresh_menu_images.items()],
+            insert_missing=False,
+        )
+        print_report(report)
+        print(f"\n🎉 Successfully updated {report['updated']} menu items with fresh images!")
         
     except Exception as e:
         print(f"❌ Error updating fresh images: {e}")
-    finally:
-        client.close()
 
 if __name__ == "__main__":
     asyncio.run(update_fresh_images())
\ No newline at end of file
@@ -1,16 +1,6 @@
 import asyncio
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-from pathlib import Path
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from menu_sync import print_report, run_sync
 
 # Menu item image mappings
 menu_images = {
@@ -34,31 +24,17 @@ menu_images = {
 
 async def update_menu_images():
     try:
-        updated_count = 0
-        
-        for name, image_url in menu_images.items():
-            result = await db.menu_items.update_one(
-                {"name": name},
-                {"$set": {"image_url": image_url}}
-            )
-            
-            if result.modified_count > 0:
-                print(f"✅ Updated image for: {name}")
-                updated_count += 1
-            else:
-                print(f"❌ Failed to update: {name}")
-        
-        print(f"\n🎉 Successfully updated {updated_count} menu items with images!")
-        
-        # Verify the updates
-        menu_items = await db.menu_items.find().to_list(1000)
-        items_with_images = [item for item in menu_items if item.get('image_url')]
-        print(f"📸 Total items with images: {len(items_with_images)}/{len(menu_items)}")
+        print("🎨 Updating menu items with images...")
+        # One bulk_write for every image that actually changed
+        report = await run_sync(
+            [{"name": name, "image_url": image_url} for name, image_url in menu_images.items()],
+            insert_missing=False,
+        )
+        print_report(report)
+        print(f"\n🎉 Successfully updated {report['updated']} menu items with images!")
         
     except Exception as e:
         print(f"Error updating menu images: {e}")
-    finally:
-        client.close()
 
 if __name__ == "__main__":
     asyncio.run(update_menu_images())
\ No newline at end of file
@@ -3,6 +3,7 @@ import { Plus } from 'lucide-react';
 import { Button } from './ui/button';
 import { Card, CardContent } from './ui/card';
 import { Badge } from './ui/badge';
+import { MENU_IMAGE_SIZES, menuImageSrcSet, menuImageUrl } from '../lib/images';
 
 const MenuItemCard = ({ item, onAddToCart, category }) => {
   const [imageLoaded, setImageLoaded] = useState(false);
@@ -24,7 +25,9 @@ const MenuItemCard = ({ item, onAddToCart, category }) => {
       <div className="h-48 relative overflow-hidden bg-gradient-to-br from-amber-200 to-orange-300">
         {item.image_url && !imageError && (
           <img
-            src={item.image_url}
+            src={menuImageUrl(item, 640)}
+            srcSet={menuImageSrcSet(item)}
+            sizes={MENU_IMAGE_SIZES}
             alt={item.name}
             className={`w-full h-full object-cover transition-opacity duration-300 ${
               imageLoaded ? 'opacity-100' : 'opacity-0'
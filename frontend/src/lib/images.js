@@ -0,0 +1,22 @@
+const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+// Short hash of the origin URL: the proxy URL changes whenever image_url does,
+// so browsers never keep showing a replaced image from their cache
+const urlVersion = (url) => {
+  let hash = 0;
+  for (let i = 0; i < url.length; i += 1) {
+    hash = (hash * 31 + url.charCodeAt(i)) | 0;
+  }
+  return (hash >>> 0).toString(36);
+};
+
+export const menuImageUrl = (item, width) => (
+  `${API_BASE}/api/images/${item.id}?w=${width}&v=${urlVersion(item.image_url)}`
+);
+
+// Resized variants served by the backend image cache, for <img srcSet>
+export const menuImageSrcSet = (item) => (
+  [320, 640].map(width => `${menuImageUrl(item, width)} ${width}w`).join(', ')
+);
+
+export const MENU_IMAGE_SIZES = '(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw';
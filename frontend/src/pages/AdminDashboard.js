@@ -1,18 +1,60 @@
-import React, { useState, useEffect } from 'react';
-import { Clock, CheckCircle, XCircle, Eye, RefreshCw } from 'lucide-react';
+import React, { useState, useEffect, useRef } from 'react';
+import { Clock, CheckCircle, XCircle, Eye, RefreshCw, Search } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
+import { Input } from '../components/ui/input';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import axios from 'axios';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 const API = `${API_BASE}/api`;
+const PAGE_SIZE = 200;
+// The list only needs summaries; full orders are fetched when one is selected
+const LIST_VIEW = 'summary';
+const SEARCH_DELAY_MS = 250;
+
+// Mirrors ORDER_STATUS_TRANSITIONS in backend/server.py: the statuses an
+// order may move to from each status (the server rejects any other with 409)
+const STATUS_TRANSITIONS = {
+  pending: ['preparing', 'cancelled'],
+  preparing: ['ready', 'cancelled'],
+  ready: ['completed', 'cancelled'],
+  completed: [],
+  cancelled: []
+};
+
+const STATUS_LABELS = {
+  pending: 'Pending',
+  preparing: 'Preparing',
+  ready: 'Ready',
+  completed: 'Completed',
+  cancelled: 'Cancelled'
+};
+
+const latestUpdate = (orders, since) => orders.reduce(
+  (latest, order) => (!latest || new Date(order.updated_at) > new Date(latest) ? order.updated_at : latest),
+  since
+);
+
+const mergeOrders = (current, changed) => {
+  const byId = new Map(current.map(order => [order.id, order]));
+  changed.forEach(order => byId.set(order.id, order));
+  return Array.from(byId.values()).sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+};
 
 const AdminDashboard = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedOrder, setSelectedOrder] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  // Name or phone search; null results means the regular list is shown
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+  // Kitchen backlog: what a new order would wait right now
+  const [kitchenQueue, setKitchenQueue] = useState(null);
+  // Newest server-side updated_at seen, used to poll only for changes
+  const lastSyncRef = useRef(null);
 
   const statusColors = {
     pending: 'bg-yellow-100 text-yellow-800 border-yellow-200',
@@ -32,15 +74,76 @@ const AdminDashboard = () => {
 
   useEffect(() => {
     fetchOrders();
-    // Auto-refresh every 30 seconds
-    const interval = setInterval(fetchOrders, 30000);
+
+    // Live order events; the browser reconnects with Last-Event-ID on its own
+    const stream = typeof EventSource !== 'undefined' ? new EventSource(`${API}/orders/stream`) : null;
+    const applyEvent = (event) => {
+      const order = JSON.parse(event.data);
+      lastSyncRef.current = latestUpdate([order], lastSyncRef.current);
+      setOrders(prev => mergeOrders(prev, [order]));
+      setSearchResults(prev => prev && prev.map(result => (result.id === order.id ? order : result)));
+      setSelectedOrder(prev => (prev && prev.id === order.id ? order : prev));
+    };
+    if (stream) {
+      stream.addEventListener('order.created', applyEvent);
+      stream.addEventListener('order.updated', applyEvent);
+      // The server could not replay what we missed: catch up over HTTP
+      stream.addEventListener('resync', syncOrders);
+    }
+
+    // Fallback: fetch only the orders changed since the last poll, every 30 seconds
+    const interval = setInterval(() => {
+      if (!stream || stream.readyState !== EventSource.OPEN) {
+        syncOrders();
+      }
+    }, 30000);
+    return () => {
+      clearInterval(interval);
+      if (stream) stream.close();
+    };
+  }, []);
+
+  useEffect(() => {
+    const fetchQueue = async () => {
+      try {
+        const response = await axios.get(`${API}/orders/queue`);
+        setKitchenQueue(response.data);
+      } catch (error) {
+        console.error('Error fetching kitchen queue:', error);
+      }
+    };
+    fetchQueue();
+    const interval = setInterval(fetchQueue, 15000);
     return () => clearInterval(interval);
   }, []);
 
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (!query) {
+      setSearchResults(null);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/orders/search`, { params: { q: query } });
+        if (!cancelled) setSearchResults(response.data);
+      } catch (error) {
+        console.error('Error searching orders:', error);
+      }
+    }, SEARCH_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
+
   const fetchOrders = async () => {
     try {
-      const response = await axios.get(`${API}/orders`);
+      const response = await axios.get(`${API}/orders`, { params: { limit: PAGE_SIZE, view: LIST_VIEW } });
       setOrders(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      lastSyncRef.current = latestUpdate(response.data, null);
     } catch (error) {
       console.error('Error fetching orders:', error);
     } finally {
@@ -48,21 +151,78 @@ const AdminDashboard = () => {
     }
   };
 
+  const syncOrders = async () => {
+    if (!lastSyncRef.current) {
+      return fetchOrders();
+    }
+    try {
+      let changed = [];
+      let cursor = null;
+      do {
+        const params = { updated_since: lastSyncRef.current, limit: 1000, view: LIST_VIEW };
+        if (cursor) params.after = cursor;
+        const response = await axios.get(`${API}/orders`, { params });
+        changed = changed.concat(response.data);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor);
+
+      if (changed.length > 0) {
+        lastSyncRef.current = latestUpdate(changed, lastSyncRef.current);
+        setOrders(prev => mergeOrders(prev, changed));
+        // Summaries carry the new status; keep the selected order's items
+        setSelectedOrder(prev => {
+          const summary = prev && changed.find(order => order.id === prev.id);
+          return summary ? { ...prev, ...summary } : prev;
+        });
+      }
+    } catch (error) {
+      console.error('Error syncing orders:', error);
+    }
+  };
+
+  const loadMoreOrders = async () => {
+    try {
+      const response = await axios.get(`${API}/orders`, { params: { limit: PAGE_SIZE, after: nextCursor, view: LIST_VIEW } });
+      setOrders(prev => mergeOrders(prev, response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error loading more orders:', error);
+    }
+  };
+
+  const selectOrder = async (order) => {
+    if (order.items) {
+      setSelectedOrder(order);
+      return;
+    }
+    try {
+      const response = await axios.get(`${API}/orders/${order.id}`);
+      setSelectedOrder(response.data);
+    } catch (error) {
+      console.error('Error fetching order:', error);
+    }
+  };
+
   const updateOrderStatus = async (orderId, newStatus) => {
+    const current = orders.find(order => order.id === orderId);
     try {
-      await axios.patch(`${API}/orders/${orderId}/status?status=${newStatus}`);
-      // Update local state
-      setOrders(orders.map(order => 
-        order.id === orderId 
-          ? { ...order, status: newStatus, updated_at: new Date().toISOString() }
-          : order
-      ));
+      const response = await axios.patch(`${API}/orders/${orderId}/status`, null, {
+        params: { status: newStatus, expected_status: current ? current.status : undefined }
+      });
+      // Update local state with the server's copy
+      setOrders(prev => mergeOrders(prev, [response.data]));
       if (selectedOrder && selectedOrder.id === orderId) {
-        setSelectedOrder({ ...selectedOrder, status: newStatus });
+        setSelectedOrder(response.data);
       }
     } catch (error) {
       console.error('Error updating order status:', error);
-      alert('Failed to update order status');
+      if (error.response && error.response.status === 409) {
+        // Someone else changed this order first; show them the latest state
+        alert(error.response.data.detail);
+        syncOrders();
+      } else {
+        alert('Failed to update order status');
+      }
     }
   };
 
@@ -89,6 +249,7 @@ const AdminDashboard = () => {
   };
 
   const stats = getOrderStats();
+  const listedOrders = searchResults || orders;
 
   if (loading) {
     return (
@@ -108,6 +269,12 @@ const AdminDashboard = () => {
         <div className="mb-8">
           <h1 className="text-4xl font-bold text-gray-900 mb-2">Cafito Admin Dashboard</h1>
           <p className="text-lg text-gray-600">Manage orders and monitor business performance</p>
+          {kitchenQueue && (
+            <p className="text-sm text-gray-500 mt-1">
+              Kitchen queue: {kitchenQueue.pending} pending, {kitchenQueue.preparing} preparing,
+              new orders ready in about {Math.max(1, Math.round(kitchenQueue.estimated_wait_seconds / 60))} min
+            </p>
+          )}
         </div>
 
         {/* Stats Cards */}
@@ -167,19 +334,28 @@ const AdminDashboard = () => {
                 </Button>
               </CardHeader>
               <CardContent>
+                <div className="relative mb-4">
+                  <Search className="absolute left-3 top-1/2 -translate-y-1/2 h-4 w-4 text-gray-400" />
+                  <Input
+                    value={searchQuery}
+                    onChange={(e) => setSearchQuery(e.target.value)}
+                    placeholder="Search by customer name or phone"
+                    className="pl-9"
+                  />
+                </div>
                 <div className="space-y-4 max-h-96 overflow-y-auto">
-                  {orders.length === 0 ? (
+                  {listedOrders.length === 0 ? (
                     <div className="text-center py-8">
-                      <p className="text-lg text-gray-500">No orders yet</p>
+                      <p className="text-lg text-gray-500">{searchResults ? 'No matching orders' : 'No orders yet'}</p>
                     </div>
                   ) : (
-                    orders.map((order) => (
+                    listedOrders.map((order) => (
                       <div 
                         key={order.id} 
                         className={`p-4 border rounded-lg cursor-pointer transition-colors ${
                           selectedOrder?.id === order.id ? 'bg-amber-50 border-amber-200' : 'hover:bg-gray-50'
                         }`}
-                        onClick={() => setSelectedOrder(order)}
+                        onClick={() => selectOrder(order)}
                       >
                         <div className="flex items-center justify-between mb-2">
                           <div className="flex items-center gap-2">
@@ -195,7 +371,7 @@ const AdminDashboard = () => {
                         <div className="flex justify-between items-center">
                           <div>
                             <p className="font-semibold">{order.customer_name}</p>
-                            <p className="text-sm text-gray-600">{order.items.length} items</p>
+                            <p className="text-sm text-gray-600">{order.items ? order.items.length : order.item_count} items</p>
                           </div>
                           <div className="text-right">
                             <p className="text-sm text-gray-600">{formatDate(order.created_at)}</p>
@@ -208,6 +384,11 @@ const AdminDashboard = () => {
                       </div>
                     ))
                   )}
+                  {nextCursor && !searchResults && (
+                    <Button onClick={loadMoreOrders} variant="outline" className="w-full">
+                      Load more orders
+                    </Button>
+                  )}
                 </div>
               </CardContent>
             </Card>
@@ -268,16 +449,18 @@ const AdminDashboard = () => {
                       <Select 
                         value={selectedOrder.status} 
                         onValueChange={(value) => updateOrderStatus(selectedOrder.id, value)}
+                        disabled={STATUS_TRANSITIONS[selectedOrder.status].length === 0}
                       >
                         <SelectTrigger className="w-full">
                           <SelectValue />
                         </SelectTrigger>
                         <SelectContent>
-                          <SelectItem value="pending">Pending</SelectItem>
-                          <SelectItem value="preparing">Preparing</SelectItem>
-                          <SelectItem value="ready">Ready</SelectItem>
-                          <SelectItem value="completed">Completed</SelectItem>
-                          <SelectItem value="cancelled">Cancelled</SelectItem>
+                          <SelectItem value={selectedOrder.status} disabled>
+                            {STATUS_LABELS[selectedOrder.status]}
+                          </SelectItem>
+                          {STATUS_TRANSITIONS[selectedOrder.status].map(status => (
+                            <SelectItem key={status} value={status}>{STATUS_LABELS[status]}</SelectItem>
+                          ))}
                         </SelectContent>
                       </Select>
                     </div>
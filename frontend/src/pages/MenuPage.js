@@ -1,19 +1,25 @@
 import React, { useState, useEffect } from 'react';
-import { Plus, Filter } from 'lucide-react';
+import { Plus, Filter, Search } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
+import { Input } from '../components/ui/input';
 import { useCart } from '../context/CartContext';
+import { MENU_IMAGE_SIZES, menuImageSrcSet, menuImageUrl } from '../lib/images';
 import axios from 'axios';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 const API = `${API_BASE}/api`;
+const SEARCH_DELAY_MS = 150;
 
 const MenuPage = () => {
   const [menuItems, setMenuItems] = useState([]);
   const [filteredItems, setFilteredItems] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState('all');
   const [loading, setLoading] = useState(true);
+  // English or Arabic search; null results means the whole menu is shown
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
   const { addItem } = useCart();
 
   const categories = [
@@ -31,12 +37,34 @@ const MenuPage = () => {
   }, []);
 
   useEffect(() => {
+    const items = searchResults || menuItems;
     if (selectedCategory === 'all') {
-      setFilteredItems(menuItems);
+      setFilteredItems(items);
     } else {
-      setFilteredItems(menuItems.filter(item => item.category === selectedCategory));
+      setFilteredItems(items.filter(item => item.category === selectedCategory));
     }
-  }, [selectedCategory, menuItems]);
+  }, [selectedCategory, menuItems, searchResults]);
+
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (!query) {
+      setSearchResults(null);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/menu/search`, { params: { q: query, limit: 100 } });
+        if (!cancelled) setSearchResults(response.data);
+      } catch (error) {
+        console.error('Error searching menu:', error);
+      }
+    }, SEARCH_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
 
   const fetchMenu = async () => {
     try {
@@ -96,6 +124,17 @@ const MenuPage = () => {
           )}
         </div>
 
+        {/* Search */}
+        <div className="relative mb-6 max-w-md">
+          <Search className="absolute left-3 top-1/2 -translate-y-1/2 h-4 w-4 text-gray-400" />
+          <Input
+            value={searchQuery}
+            onChange={(e) => setSearchQuery(e.target.value)}
+            placeholder="Search the menu / ابحث في القائمة"
+            className="pl-9"
+          />
+        </div>
+
         {/* Category Filter */}
         <div className="mb-8">
           <div className="flex items-center gap-4 mb-4">
@@ -127,7 +166,9 @@ const MenuPage = () => {
               <div className="h-48 bg-gradient-to-br from-amber-200 to-orange-300 relative overflow-hidden">
                 {item.image_url && (
                   <img 
-                    src={item.image_url} 
+                    src={menuImageUrl(item, 640)}
+                    srcSet={menuImageSrcSet(item)}
+                    sizes={MENU_IMAGE_SIZES}
                     alt={item.name}
                     className="w-full h-full object-cover"
                     onError={(e) => {
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { Minus, Plus, Trash2, ShoppingBag, Phone, User } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
@@ -11,6 +11,12 @@ import axios from 'axios';
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 const API = `${API_BASE}/api`;
 
+const newIdempotencyKey = () => (
+  window.crypto && window.crypto.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+);
+
 const OrderPage = () => {
   const { cart, updateQuantity, removeItem, clearCart, getTotalPrice } = useCart();
   const [customerInfo, setCustomerInfo] = useState({
@@ -21,6 +27,11 @@ const OrderPage = () => {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [orderSuccess, setOrderSuccess] = useState(false);
   const [orderId, setOrderId] = useState('');
+  // Kitchen estimate returned with the order; null when none is available
+  const [waitMinutes, setWaitMinutes] = useState(null);
+  // Reused while the same order is resubmitted, so a retry after a dropped
+  // connection returns the first order instead of placing a second one
+  const pendingSubmitRef = useRef(null);
 
   const handleQuantityChange = (id, newQuantity) => {
     if (newQuantity <= 0) {
@@ -56,22 +67,35 @@ const OrderPage = () => {
         customer_name: customerInfo.name,
         customer_phone: customerInfo.phone || null,
         notes: customerInfo.notes || null,
+        // Prices and names are looked up from the menu on the server
         items: cart.items.map(item => ({
           menu_item_id: item.id,
-          quantity: item.quantity,
-          price: item.price,
-          name: item.name
+          quantity: item.quantity
         }))
       };
 
-      const response = await axios.post(`${API}/orders`, orderData);
+      const body = JSON.stringify(orderData);
+      if (!pendingSubmitRef.current || pendingSubmitRef.current.body !== body) {
+        pendingSubmitRef.current = { body, key: newIdempotencyKey() };
+      }
+      const response = await axios.post(`${API}/orders`, orderData, {
+        headers: { 'Idempotency-Key': pendingSubmitRef.current.key }
+      });
+      pendingSubmitRef.current = null;
       setOrderId(response.data.id);
+      const waitSeconds = response.data.estimated_wait_seconds;
+      setWaitMinutes(waitSeconds == null ? null : Math.max(1, Math.round(waitSeconds / 60)));
       setOrderSuccess(true);
       clearCart();
       setCustomerInfo({ name: '', phone: '', notes: '' });
     } catch (error) {
       console.error('Error submitting order:', error);
-      alert('Failed to submit order. Please try again.');
+      const detail = error.response && error.response.status === 422 && error.response.data.detail;
+      if (Array.isArray(detail) && detail.every(problem => typeof problem === 'string')) {
+        alert(`Please update your order:\n${detail.join('\n')}`);
+      } else {
+        alert('Failed to submit order. Please try again.');
+      }
     } finally {
       setIsSubmitting(false);
     }
@@ -91,7 +115,9 @@ const OrderPage = () => {
               <p className="text-sm text-green-600 mb-6">Order ID: {orderId}</p>
               <p className="text-gray-600 mb-6">
                 Your order has been received and is being prepared. 
-                We'll have it ready for you soon!
+                {waitMinutes != null
+                  ? ` It should be ready in about ${waitMinutes} minute${waitMinutes === 1 ? '' : 's'}.`
+                  : " We'll have it ready for you soon!"}
               </p>
               <div className="flex gap-4 justify-center">
                 <Button 
@@ -0,0 +1,43 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture
+def mongo():
+    """A fresh in-memory database (mongomock-motor)."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()["cafito_test"]
+
+
+@pytest.fixture(scope="session")
+def mongomock_motor():
+    """Motor swapped for mongomock-motor, with the benchmarks' find_one_and_update fix."""
+    from benchmarks.common import use_mongomock
+
+    use_mongomock()
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, mongomock_motor):
+    """TestClient for the FastAPI app running on mongomock-motor.
+
+    The server module is imported afresh for every test, so its menu cache,
+    order board, idempotency keys and other process-wide state start empty.
+    """
+    monkeypatch.setenv("MENU_CACHE_POLL_SECONDS", "0")
+    monkeypatch.setenv("IMAGE_CACHE_DIR", str(tmp_path / "image_cache"))
+    monkeypatch.delitem(sys.modules, "server", raising=False)
+    import server
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as client:
+        yield client
+        client.portal.call(server.client.drop_database, server.db.name)
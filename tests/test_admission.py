@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionControl, Overloaded
+
+PRIORITIES = {"create_order": 0, "read_order": 1, "analytics": 5}
+
+
+def test_freed_slots_go_to_the_most_important_waiter():
+    admission = AdmissionControl(capacity=1, priorities=PRIORITIES)
+    admitted = []
+
+    async def request(route):
+        await admission.acquire(route)
+        admitted.append(route)
+        admission.release(route)
+
+    async def burst():
+        await admission.acquire("read_order")
+        waiters = [asyncio.create_task(request(route)) for route in ("analytics", "read_order", "create_order")]
+        await asyncio.sleep(0)
+        admission.release("read_order")
+        await asyncio.gather(*waiters)
+
+    asyncio.run(burst())
+    assert admitted == ["create_order", "read_order", "analytics"]
+
+
+def test_a_full_queue_sheds_the_least_important_waiter():
+    admission = AdmissionControl(capacity=1, queue_size=1, priorities=PRIORITIES)
+
+    async def burst():
+        await admission.acquire("read_order")
+        analytics = asyncio.create_task(admission.acquire("analytics"))
+        await asyncio.sleep(0)
+        order = asyncio.create_task(admission.acquire("create_order"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await analytics
+        # A less important request than the one waiting is shed itself
+        with pytest.raises(Overloaded):
+            await admission.acquire("analytics")
+        admission.release("read_order")
+        await order
+
+    asyncio.run(burst())
+    stats = admission.stats()
+    assert stats["analytics_shed"] == 2
+    assert stats["create_order_active"] == 1
+
+
+def test_route_limits_hold_back_a_route_but_not_others():
+    admission = AdmissionControl(capacity=4, wait_timeout=0.05, limits={"analytics": 1}, priorities=PRIORITIES)
+
+    async def burst():
+        await admission.acquire("analytics")
+        with pytest.raises(Overloaded):
+            await admission.acquire("analytics")
+        await admission.acquire("create_order")
+
+    asyncio.run(burst())
+    assert admission.stats()["timed_out"] == 1
+    assert admission.stats()["active"] == 2
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+
+from pymongo.errors import AutoReconnect
+
+import analytics
+
+
+def order(number, created_at, quantity=1):
+    return {
+        "id": f"order-{number}", "created_at": created_at, "status": "pending", "total_amount": 4.5 * quantity,
+        "items": [{"menu_item_id": "croissant", "name": "Croissant", "price": 4.5, "quantity": quantity}],
+    }
+
+
+ORDERS = [
+    order(0, datetime(2026, 1, 1, 9, 5)),
+    order(1, datetime(2026, 1, 1, 9, 55), quantity=2),
+    order(2, datetime(2026, 1, 1, 10, 0)),
+]
+
+
+def rollups(mongo):
+    async def load():
+        return await mongo.order_rollups.find().sort("_id", 1).to_list(None)
+
+    return asyncio.run(load())
+
+
+def test_batched_rollup_updates_match_one_update_per_order(mongo):
+    async def record():
+        for created in ORDERS:
+            await analytics.record_order_created(mongo, created)
+
+    asyncio.run(record())
+    one_by_one = rollups(mongo)
+    asyncio.run(mongo.order_rollups.drop())
+    asyncio.run(analytics.record_orders_created(mongo, ORDERS))
+
+    assert rollups(mongo) == one_by_one
+    assert [(rollup["orders"], rollup["items"]["croissant"]["quantity"]) for rollup in one_by_one] == [(2, 3), (1, 1)]
+
+
+def test_failed_rollup_updates_are_counted_not_raised(mongo):
+    class Unreachable:
+        async def update_one(self, *args, **kwargs):
+            raise AutoReconnect("connection refused")
+
+        async def bulk_write(self, *args, **kwargs):
+            raise AutoReconnect("connection refused")
+
+    class Database:
+        order_rollups = Unreachable()
+
+    recorder = analytics.RollupRecorder(Database())
+
+    async def record():
+        await recorder.order_created(ORDERS[0])
+        await recorder.orders_created(ORDERS[1:])
+        await recorder.order_cancelled(ORDERS[0])
+
+    asyncio.run(record())
+    assert recorder.stats() == {"recorded": 0, "failed": 4}
@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+
+from pymongo.errors import AutoReconnect
+
+from cluster_bus import GAP, ClusterBus
+
+
+class CappedCollection:
+    """In-memory capped collection with tailable cursors, which mongomock lacks."""
+
+    def __init__(self, size=100):
+        self.size = size
+        self.docs = []
+        self.last_id = 0
+        self.down = False
+
+    async def insert_one(self, doc):
+        if self.down:
+            raise AutoReconnect("connection refused")
+        self.last_id += 1
+        self.docs = (self.docs + [dict(doc, _id=self.last_id)])[-self.size:]
+        return SimpleNamespace(inserted_id=self.last_id)
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs if doc["_id"] == query["_id"]), None)
+
+    def find(self, cursor_type=None):
+        return TailableCursor(self)
+
+
+class TailableCursor:
+    def __init__(self, collection):
+        self.collection = collection
+        self.last_id = 0
+        self.alive = True
+
+    def max_await_time_ms(self, ms):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        for doc in self.collection.docs:
+            if doc["_id"] > self.last_id:
+                self.last_id = doc["_id"]
+                return doc
+        await asyncio.sleep(0.01)
+        raise StopAsyncIteration
+
+
+class Database:
+    def __init__(self):
+        self.collection = CappedCollection()
+
+    def __getitem__(self, name):
+        return self.collection
+
+    async def create_collection(self, name, **options):
+        pass
+
+
+async def until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def test_events_reach_other_processes_but_not_the_publisher():
+    db = Database()
+    kitchen, counter = ClusterBus(db), ClusterBus(db)
+    seen = {"kitchen": [], "counter": []}
+
+    async def run():
+        kitchen.on("order.updated", lambda data: asyncio.sleep(0, seen["kitchen"].append(data)))
+        counter.on("order.updated", lambda data: asyncio.sleep(0, seen["counter"].append(data)))
+        await kitchen.start()
+        await counter.start()
+        await counter.publish("order.updated", {"id": "order-1", "status": "ready"})
+        await until(lambda: seen["kitchen"])
+        await kitchen.stop()
+        await counter.stop()
+
+    asyncio.run(run())
+    assert seen == {"kitchen": [{"id": "order-1", "status": "ready"}], "counter": []}
+    assert counter.stats()["published"] == 1
+    assert kitchen.stats()["received"] == 1
+
+
+def test_a_failed_publish_is_counted_and_peers_resync_once_it_recovers():
+    db = Database()
+    kitchen, counter = ClusterBus(db), ClusterBus(db)
+    resyncs = []
+
+    async def run():
+        kitchen.on(GAP, lambda data: asyncio.sleep(0, resyncs.append(data)))
+        await kitchen.start()
+        await counter.start()
+        db.collection.down = True
+        await counter.publish("order.updated", {"id": "order-1", "status": "ready"})
+        assert counter.stats()["publish_failed"] == 1
+        assert not resyncs
+        db.collection.down = False
+        # Announced by the tailing loop without waiting for another change
+        await until(lambda: resyncs)
+        await kitchen.stop()
+        await counter.stop()
+
+    asyncio.run(run())
+    assert resyncs == [None]
+    assert counter.stats()["published"] == 0
+    assert kitchen.stats()["gaps"] == 1
+
+
+def test_a_process_whose_position_was_overwritten_resyncs():
+    db = Database()
+    db.collection.size = 3
+    bus = ClusterBus(db)
+    resyncs = []
+
+    async def run():
+        bus.on(GAP, lambda data: asyncio.sleep(0, resyncs.append(data)))
+        result = await bus._insert("start")
+        for number in range(5):
+            await db.collection.insert_one({"origin": "other", "type": "order.created", "data": {"id": number}})
+        bus._task = asyncio.create_task(bus._run(result.inserted_id))
+        await until(lambda: resyncs)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert bus.stats()["gaps"] == 1
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+# Stored before customer_phone, notes, preparing_at and ready_at existed
+OLD_ORDER = {
+    "id": "order-old", "customer_name": "Layla", "total_amount": 9.0, "status": "completed",
+    "items": [{"menu_item_id": "croissant", "quantity": 2, "price": 4.5, "name": "Croissant"}],
+    "created_at": datetime(2025, 6, 1, 9, 0), "updated_at": datetime(2025, 6, 1, 9, 20),
+}
+
+
+@pytest.fixture
+def old_order(api):
+    import server
+
+    api.portal.call(server.db.orders.insert_one, dict(OLD_ORDER, search_terms=["layla"]))
+    return server
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/orders", {}),
+    ("/api/orders", {"fields": "customer_name,ready_at"}),
+    ("/api/orders/search", {"q": "layla"}),
+    ("/api/orders/order-old", {}),
+])
+def test_fast_responses_match_the_models_for_old_orders(api, old_order, monkeypatch, path, params):
+    monkeypatch.setattr(old_order, "FAST_JSON", False)
+    validated = api.get(path, params=params)
+    monkeypatch.setattr(old_order, "FAST_JSON", True)
+    fast = api.get(path, params=params)
+    assert validated.status_code == fast.status_code == 200
+    assert fast.json() == validated.json()
+
+
+def test_missing_fields_get_the_model_defaults(api, old_order, monkeypatch):
+    monkeypatch.setattr(old_order, "FAST_JSON", True)
+    order = api.get("/api/orders/order-old").json()
+    assert {name: order[name] for name in ("customer_phone", "notes", "preparing_at", "ready_at")} == dict.fromkeys(
+        ("customer_phone", "notes", "preparing_at", "ready_at")
+    )
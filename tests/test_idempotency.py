@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from idempotency import IdempotencyInProgress, IdempotencyKeyReused, IdempotencyStore
+
+
+class Orders:
+    """Operation placing an order under the claim's id, and its recovery lookup."""
+
+    def __init__(self):
+        self.placed = {}
+        self.calls = 0
+
+    async def place(self, order_id):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if order_id in self.placed:
+            raise RuntimeError("duplicate key")
+        self.placed[order_id] = {"id": order_id}
+        return self.placed[order_id]
+
+    async def recover(self, order_id):
+        return self.placed.get(order_id)
+
+
+def stale_claim(op_id):
+    return {
+        "_id": "key", "fingerprint": "body", "op_id": op_id,
+        "created_at": datetime.utcnow() - timedelta(minutes=5), "result": None,
+    }
+
+
+def test_concurrent_duplicates_run_the_operation_once(mongo):
+    orders = Orders()
+    store = IdempotencyStore(mongo.idempotency_keys)
+
+    async def retries():
+        return await asyncio.gather(*(store.run("key", "body", orders.place, orders.recover) for _ in range(5)))
+
+    results = asyncio.run(retries())
+    assert orders.calls == 1
+    assert len({result["id"] for result in results}) == 1
+    assert store.stats()["coalesced"] == 4
+
+
+def test_a_retry_on_another_worker_replays_the_stored_result(mongo):
+    orders = Orders()
+
+    async def retry():
+        first = await IdempotencyStore(mongo.idempotency_keys).run("key", "body", orders.place, orders.recover)
+        second = await IdempotencyStore(mongo.idempotency_keys).run("key", "body", orders.place, orders.recover)
+        return first, second
+
+    first, second = asyncio.run(retry())
+    assert first == second
+    assert orders.calls == 1
+
+
+def test_reusing_a_key_for_another_body_is_rejected(mongo):
+    orders = Orders()
+    store = IdempotencyStore(mongo.idempotency_keys)
+
+    async def reuse():
+        await store.run("key", "body", orders.place, orders.recover)
+        await store.run("key", "other body", orders.place, orders.recover)
+
+    with pytest.raises(IdempotencyKeyReused):
+        asyncio.run(reuse())
+
+
+def test_a_claim_in_progress_elsewhere_is_not_run_again(mongo):
+    orders = Orders()
+    store = IdempotencyStore(mongo.idempotency_keys, wait_timeout=0.1)
+
+    async def retry():
+        await mongo.idempotency_keys.insert_one({**stale_claim("order-1"), "created_at": datetime.utcnow()})
+        await store.run("key", "body", orders.place, orders.recover)
+
+    with pytest.raises(IdempotencyInProgress):
+        asyncio.run(retry())
+    assert orders.calls == 0
+
+
+def test_taking_over_a_stale_claim_returns_the_committed_order(mongo):
+    # The order was placed but storing the result on the claim failed
+    orders = Orders()
+    orders.placed["order-1"] = {"id": "order-1"}
+    store = IdempotencyStore(mongo.idempotency_keys)
+
+    async def retry():
+        await mongo.idempotency_keys.insert_one(stale_claim("order-1"))
+        result = await store.run("key", "body", orders.place, orders.recover)
+        return result, await mongo.idempotency_keys.find_one({"_id": "key"})
+
+    result, claim = asyncio.run(retry())
+    assert result == {"id": "order-1"}
+    assert claim["result"] == {"id": "order-1"}
+    assert orders.calls == 0
+    assert store.stats()["recovered"] == 1
+
+
+def test_taking_over_a_stale_claim_reruns_under_the_same_id(mongo):
+    orders = Orders()
+    store = IdempotencyStore(mongo.idempotency_keys)
+
+    async def retry():
+        await mongo.idempotency_keys.insert_one(stale_claim("order-1"))
+        return await store.run("key", "body", orders.place, orders.recover)
+
+    assert asyncio.run(retry()) == {"id": "order-1"}
+    assert list(orders.placed) == ["order-1"]
+
+
+def test_a_failed_operation_releases_the_key(mongo):
+    orders = Orders()
+    store = IdempotencyStore(mongo.idempotency_keys)
+
+    async def fail(order_id):
+        raise ValueError("menu item unavailable")
+
+    async def retry():
+        with pytest.raises(ValueError):
+            await store.run("key", "body", fail, orders.recover)
+        return await store.run("key", "body", orders.place, orders.recover)
+
+    assert asyncio.run(retry())["id"] in orders.placed
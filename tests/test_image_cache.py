@@ -0,0 +1,148 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+from PIL import Image
+
+import image_cache
+from image_cache import ImageCache, ImageFetchError, check_public_url, http_fetcher
+
+
+def jpeg(width=800, height=600):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(output, "JPEG")
+    return output.getvalue()
+
+
+class Origin:
+    """Stub fetcher counting downloads per URL."""
+
+    def __init__(self, content=None):
+        self.content = content or jpeg()
+        self.fetches = []
+
+    async def __call__(self, url):
+        self.fetches.append(url)
+        await asyncio.sleep(0.01)
+        return self.content, "image/jpeg"
+
+
+def disk_bytes(directory):
+    return sum(path.stat().st_size for path in directory.iterdir())
+
+
+def test_misses_resize_once_and_hits_come_from_disk(tmp_path):
+    origin = Origin()
+    cache = ImageCache(tmp_path, origin)
+
+    async def requests():
+        miss = await cache.get("https://img.example/croissant.jpg", 300)
+        hit = await cache.get("https://img.example/croissant.jpg", 320)
+        return miss, hit
+
+    (path, media_type), hit = asyncio.run(requests())
+    assert hit == (path, media_type)
+    assert media_type == "image/webp"
+    with Image.open(path) as image:
+        assert image.size == (320, 240)
+    assert len(origin.fetches) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_concurrent_misses_for_every_width_share_one_download(tmp_path):
+    origin = Origin()
+    cache = ImageCache(tmp_path, origin)
+
+    async def burst():
+        await asyncio.gather(*(cache.get("https://img.example/a.jpg", width) for width in image_cache.IMAGE_WIDTHS * 3))
+
+    asyncio.run(burst())
+    assert len(origin.fetches) == 1
+    # The origin plus one file per width, counted once each
+    assert cache.stats()["files"] == len(image_cache.IMAGE_WIDTHS) + 1
+    assert cache.stats()["bytes"] == disk_bytes(tmp_path)
+
+
+def test_a_restart_picks_up_the_files_on_disk(tmp_path):
+    origin = Origin()
+
+    async def warm_then_restart():
+        await ImageCache(tmp_path, origin).get("https://img.example/a.jpg", 160)
+        restarted = ImageCache(tmp_path, origin)
+        await asyncio.gather(*(restarted.get("https://img.example/a.jpg", 160) for _ in range(5)))
+        return restarted
+
+    restarted = asyncio.run(warm_then_restart())
+    assert len(origin.fetches) == 1
+    assert restarted.stats()["hits"] == 5
+    assert restarted.stats()["bytes"] == disk_bytes(tmp_path)
+
+
+def test_least_recently_used_files_are_evicted_past_the_budget(tmp_path):
+    origin = Origin()
+    cache = ImageCache(tmp_path, origin, max_bytes=len(origin.content) + 1)
+
+    async def requests():
+        first, _ = await cache.get("https://img.example/a.jpg", 160)
+        second, _ = await cache.get("https://img.example/b.jpg", 160)
+        return first, second
+
+    first, second = asyncio.run(requests())
+    assert not first.exists()
+    assert second.exists()
+    assert cache.stats()["evictions"] > 0
+    assert cache.stats()["bytes"] == disk_bytes(tmp_path) <= cache.max_bytes
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://img.example/a.jpg",
+    "http://127.0.0.1/a.jpg",
+    "http://10.0.0.5/a.jpg",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/a.jpg",
+    "http://[::ffff:192.168.1.1]/a.jpg",
+])
+def test_internal_and_non_http_urls_are_refused(url):
+    with pytest.raises(ImageFetchError):
+        asyncio.run(check_public_url(url))
+
+
+def test_public_addresses_are_allowed():
+    asyncio.run(check_public_url("https://93.184.215.14/a.jpg"))
+
+
+@pytest.fixture
+def origin_server(monkeypatch):
+    """Serve http_fetcher's requests from `routes` (path -> httpx.Response) without a network."""
+    routes = {}
+    transport = httpx.MockTransport(lambda request: routes[request.url.path])
+    client = httpx.AsyncClient
+
+    async def any_url(url):
+        if "internal" in url:
+            raise ImageFetchError(f"{url}: not a public address")
+
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: client(transport=transport, **kwargs))
+    monkeypatch.setattr(image_cache, "check_public_url", any_url)
+    return routes
+
+
+def test_fetcher_returns_allowed_images(origin_server):
+    origin_server["/a.jpg"] = httpx.Response(200, content=b"jpeg", headers={"Content-Type": "image/jpeg"})
+    assert asyncio.run(http_fetcher("https://img.example/a.jpg")) == (b"jpeg", "image/jpeg")
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(200, content=b"<html>", headers={"Content-Type": "text/html"}),
+    httpx.Response(200, content=b"<svg onload=alert(1)>", headers={"Content-Type": "image/svg+xml"}),
+    httpx.Response(200, content=b"x" * 2048, headers={"Content-Type": "image/png"}),
+    httpx.Response(302, headers={"Location": "http://internal.example/secret"}),
+    httpx.Response(404),
+])
+def test_fetcher_refuses_other_responses(origin_server, response):
+    origin_server["/a.jpg"] = response
+    with pytest.raises(ImageFetchError):
+        asyncio.run(http_fetcher("https://img.example/a.jpg", max_bytes=1024))
@@ -0,0 +1,106 @@
+from enum import Enum
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from menu_search import MenuSearchIndex
+
+
+class Category(str, Enum):
+    SPECIALTY_COFFEE = "specialty_coffee"
+    PASTRIES = "pastries"
+
+
+class MenuItem(BaseModel):
+    id: str
+    name: str
+    name_ar: str
+    description: str
+    description_ar: str
+    category: Category
+    available: bool = True
+
+
+MENU = [
+    MenuItem(id="latte", name="Spanish Latte", name_ar="لاتيه إسباني", description="Espresso with condensed milk",
+             description_ar="إسبريسو مع الحليب المكثف", category="specialty_coffee"),
+    MenuItem(id="flat-white", name="Flat White", name_ar="فلات وايت", description="Espresso with steamed milk",
+             description_ar="إسبريسو مع حليب مبخر", category="specialty_coffee"),
+    MenuItem(id="milk-cake", name="Milk Cake", name_ar="كيكة الحليب", description="Sponge soaked in three milks",
+             description_ar="إسفنج منقوع بثلاثة أنواع من الحليب", category="pastries"),
+    MenuItem(id="croissant", name="Croissant", name_ar="كرواسون", description="Butter pastry",
+             description_ar="معجنات بالزبدة", category="pastries", available=False),
+]
+
+
+def snapshot(items):
+    return SimpleNamespace(items={item.id: item for item in items})
+
+
+def synced(items=MENU):
+    index = MenuSearchIndex()
+    index.sync(snapshot(items))
+    return index
+
+
+def ids(items):
+    return [item.id for item in items]
+
+
+def test_half_typed_words_match_by_prefix():
+    assert ids(synced().search("flat wh")) == ["flat-white"]
+    assert ids(synced().search("spa")) == ["latte"]
+
+
+def test_name_matches_rank_above_description_matches():
+    # "milk" names the cake but only describes the coffees
+    assert ids(synced().search("milk")) == ["milk-cake", "flat-white", "latte"]
+
+
+def test_whole_words_rank_above_prefixes():
+    index = synced([
+        MenuItem(id="tea", name="Tea", name_ar="شاي", description="", description_ar="", category="pastries"),
+        MenuItem(id="teacake", name="Teacake", name_ar="كعكة", description="", description_ar="", category="pastries"),
+    ])
+    assert ids(index.search("tea")) == ["tea", "teacake"]
+
+
+def test_arabic_queries_fold_hamza_and_the_article():
+    # Typed without hamza or the article
+    assert ids(synced().search("اسبريسو")) == ["flat-white", "latte"]
+    assert ids(synced().search("حليب")) == ["milk-cake", "flat-white", "latte"]
+    assert ids(synced().search("الحليب")) == ids(synced().search("حليب"))
+
+
+def test_every_word_must_match_and_unavailable_items_are_left_out():
+    assert ids(synced().search("milk cake")) == ["milk-cake"]
+    assert synced().search("milk croissant") == []
+    assert synced().search("croissant") == []
+    assert synced().search("  ") == []
+
+
+def test_sync_reindexes_only_changed_items_and_drops_deleted_ones():
+    index = synced()
+    assert index.stats()["reindexed"] == len(MENU)
+    renamed = MENU[1].model_copy(update={"name": "Cortado"})
+    index.sync(snapshot([MENU[0], renamed, MENU[3]]))
+    assert index.stats()["reindexed"] == len(MENU) + 1
+    assert index.stats()["items"] == 3
+    assert index.search("flat") == []
+    assert ids(index.search("cortado")) == ["flat-white"]
+    assert index.search("cake") == []
+    # Words only the deleted and renamed items used are gone too
+    assert "cake" not in index._postings and "white" not in index._postings
+
+
+def test_the_same_snapshot_is_not_synced_twice():
+    index = MenuSearchIndex()
+    menu = snapshot(MENU)
+    index.sync(menu)
+    index.sync(menu)
+    assert index.stats()["builds"] == 1
+    assert index.stats()["reindexed"] == len(MENU)
+
+
+def test_body_is_the_json_of_the_results():
+    assert synced().body("flat") == b"[" + MENU[1].model_dump_json().encode() + b"]"
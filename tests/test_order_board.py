@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel
+
+from order_board import OrderBoard
+
+
+class Status(str, Enum):
+    PENDING = "pending"
+    PREPARING = "preparing"
+    COMPLETED = "completed"
+
+
+class Order(BaseModel):
+    id: str
+    status: Status
+    created_at: datetime
+    updated_at: datetime
+
+
+def loaded_board(mongo):
+    board = OrderBoard(mongo.orders, Order)
+    asyncio.run(board.load())
+    return board
+
+
+def test_a_change_read_back_within_the_same_millisecond_is_applied(mongo):
+    board = loaded_board(mongo)
+    created = datetime(2026, 1, 1, 12, 0, 0, 123456)
+    board.apply(Order(id="order-1", status="pending", created_at=created, updated_at=created))
+    # Status update 300µs later, returned by MongoDB truncated to milliseconds
+    board.apply(Order(id="order-1", status="preparing", created_at=created, updated_at=created.replace(microsecond=123000)))
+    assert board.get("order-1").status == Status.PREPARING
+
+
+def test_an_older_change_arriving_late_is_ignored(mongo):
+    board = loaded_board(mongo)
+    created = datetime(2026, 1, 1, 12, 0)
+    board.apply(Order(id="order-1", status="pending", created_at=created, updated_at=created))
+    board.apply(Order(id="order-1", status="preparing", created_at=created, updated_at=created.replace(second=5)))
+    board.apply(Order(id="order-1", status="pending", created_at=created, updated_at=created.replace(second=2)))
+    assert board.get("order-1").status == Status.PREPARING
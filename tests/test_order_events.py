@@ -0,0 +1,61 @@
+import asyncio
+
+from order_events import RESYNC, OrderEventBroker
+
+
+def drain(subscription):
+    items = []
+    while not subscription.queue.empty():
+        items.append(subscription.queue.get_nowait())
+    return items
+
+
+def test_resuming_replays_only_the_missed_events():
+    async def resume():
+        broker = OrderEventBroker(history=10)
+        seen = broker.publish("order.created", "{}")
+        broker.publish("order.updated", '{"status": "preparing"}')
+        broker.publish("order.updated", '{"status": "ready"}')
+        return drain(broker.subscribe(seen.id)), broker
+
+    events, broker = asyncio.run(resume())
+    assert [event.id for event in events] == [f"{broker.epoch}-2", f"{broker.epoch}-3"]
+    assert events[-1].frame.startswith(f"id: {broker.epoch}-3\nevent: order.updated\n".encode())
+
+
+def test_resuming_from_the_latest_event_replays_nothing():
+    async def resume():
+        broker = OrderEventBroker()
+        latest = broker.publish("order.created", "{}")
+        return drain(broker.subscribe(latest.id))
+
+    assert asyncio.run(resume()) == []
+
+
+def test_unknown_or_expired_tokens_resync():
+    async def resume():
+        broker = OrderEventBroker(history=2)
+        first = broker.publish("order.created", "{}")
+        for _ in range(3):
+            broker.publish("order.updated", "{}")
+        return [
+            drain(broker.subscribe(token))
+            # Fallen out of history, from a previous process, from the future, malformed
+            for token in (first.id, "0badbeef-3", f"{broker.epoch}-99", "garbage")
+        ]
+
+    assert asyncio.run(resume()) == [[RESYNC]] * 4
+
+
+def test_a_slow_subscriber_is_told_to_resync_instead_of_blocking():
+    async def publish():
+        broker = OrderEventBroker(queue_size=2)
+        subscription = broker.subscribe()
+        for _ in range(5):
+            broker.publish("order.created", "{}")
+        return drain(subscription), broker.stats()
+
+    items, stats = asyncio.run(publish())
+    assert items == [RESYNC]
+    assert stats["resyncs"] == 1
+    assert stats["published"] == 5
@@ -0,0 +1,175 @@
+import asyncio
+
+from bson import json_util
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError
+
+from order_ingest import OrderWriteBehind
+
+
+class Unreachable:
+    """A collection whose server never answers."""
+
+    async def insert_many(self, docs, ordered=True):
+        raise AutoReconnect("connection refused")
+
+
+class Rejecting:
+    """Inserts into `collection`, rejecting documents marked invalid like a validator would."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert_many(self, docs, ordered=True):
+        errors = []
+        for index, doc in enumerate(docs):
+            if doc.get("invalid"):
+                errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+                continue
+            try:
+                await self.collection.insert_one(doc)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e)})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+
+class Slow:
+    """Inserts into `collection` after a network round trip's delay."""
+
+    def __init__(self, collection, delay=0.01):
+        self.collection = collection
+        self.delay = delay
+
+    async def insert_many(self, docs, ordered=True):
+        await asyncio.sleep(self.delay)
+        return await self.collection.insert_many(docs, ordered=ordered)
+
+
+def order(number, **extra):
+    return {"id": f"order-{number}", "customer_name": f"Customer {number}", **extra}
+
+
+def test_journaled_orders_are_replayed_after_a_crash(mongo, tmp_path):
+    journal = str(tmp_path / "orders.jsonl")
+
+    async def crash():
+        writer = OrderWriteBehind(Unreachable(), flush_interval=0.001, journal_path=journal)
+        await writer.start()
+        for number in range(3):
+            await writer.submit(order(number))
+        # The process dies with every acknowledged order still unwritten
+        writer._task.cancel()
+        writer._journal.close()
+
+    async def restart():
+        await mongo.orders.create_index("id", unique=True)
+        # One order made it to MongoDB before the crash
+        await mongo.orders.insert_one(order(0))
+        writer = OrderWriteBehind(mongo.orders, flush_interval=0.001, journal_path=journal)
+        await writer.start()
+        assert writer.pending("order-1") is not None
+        await writer.wait_written("order-2")
+        await writer.stop()
+        return sorted(doc["id"] for doc in await mongo.orders.find().to_list(None))
+
+    asyncio.run(crash())
+    assert asyncio.run(restart()) == ["order-0", "order-1", "order-2"]
+    with open(journal) as lines:
+        assert lines.read() == ""
+
+
+def test_rejected_orders_are_dead_lettered_without_blocking_the_rest(mongo):
+    async def ingest():
+        writer = OrderWriteBehind(Rejecting(mongo.orders), flush_interval=0.001, dead_letter=mongo.orders_dead_letter)
+        await writer.start()
+        await writer.submit(order(0))
+        await writer.submit(order(1, invalid=True))
+        await writer.submit(order(2))
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(ingest())
+
+    async def stored():
+        written = sorted(doc["id"] for doc in await mongo.orders.find().to_list(None))
+        return written, await mongo.orders_dead_letter.find().to_list(None)
+
+    written, dead = asyncio.run(stored())
+    assert written == ["order-0", "order-2"]
+    assert [doc["order_id"] for doc in dead] == ["order-1"]
+    assert json_util.loads(dead[0]["document"])["customer_name"] == "Customer 1"
+    assert writer.stats()["failed"] == 1
+    assert writer.stats()["written"] == 2
+
+
+def test_journal_stays_bounded_under_constant_load(mongo, tmp_path):
+    journal = tmp_path / "orders.jsonl"
+
+    async def ingest():
+        writer = OrderWriteBehind(Slow(mongo.orders), batch_size=10, flush_interval=0.001, journal_path=str(journal))
+        await writer.start()
+        longest = 0
+        for number in range(500):
+            await writer.submit(order(number))
+            if number % 5 == 4:
+                # Let the writer keep up, so orders never stop arriving while it works
+                await asyncio.sleep(0.004)
+            longest = max(longest, len(journal.read_bytes().splitlines()))
+        unwritten = set(writer._pending)
+        journaled = {json_util.loads(line)["id"] for line in journal.read_bytes().splitlines()}
+        await writer.stop()
+        return longest, unwritten, journaled, writer.stats()
+
+    longest, unwritten, journaled, stats = asyncio.run(ingest())
+    assert unwritten <= journaled
+    assert stats["journal_compactions"] > 0
+    assert longest < 250
+
+
+def test_written_batches_are_reported_without_replays_or_rejects(mongo):
+    reported = []
+
+    async def on_written(docs):
+        reported.extend(doc["id"] for doc in docs)
+
+    async def ingest():
+        await mongo.orders.create_index("id", unique=True)
+        await mongo.orders.insert_one(order(0))
+        writer = OrderWriteBehind(Rejecting(mongo.orders), flush_interval=0.001, on_written=on_written)
+        await writer.start()
+        for number, extra in enumerate(({}, {}, {"invalid": True}, {})):
+            await writer.submit(order(number, **extra))
+        await writer.stop()
+
+    asyncio.run(ingest())
+    assert reported == ["order-1", "order-3"]
+
+
+def test_journal_errors_do_not_stop_the_writer(mongo, tmp_path):
+    class FullDisk:
+        """A journal file that cannot be truncated."""
+
+        def __init__(self, journal):
+            self.journal = journal
+
+        def truncate(self, size):
+            raise OSError(28, "No space left on device")
+
+        def __getattr__(self, name):
+            return getattr(self.journal, name)
+
+    async def ingest():
+        writer = OrderWriteBehind(mongo.orders, flush_interval=0.001, journal_path=str(tmp_path / "orders.jsonl"))
+        await writer.start()
+        writer._journal = FullDisk(writer._journal)
+        for number in range(3):
+            await writer.submit(order(number))
+            await writer.wait_written(f"order-{number}")
+        stats = writer.stats()
+        await writer.stop()
+        return stats
+
+    stats = asyncio.run(ingest())
+    assert stats["written"] == 3
+    assert stats["errors"] == 3
+    assert asyncio.run(mongo.orders.count_documents({})) == 3
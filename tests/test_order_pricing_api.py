@@ -0,0 +1,82 @@
+import pytest
+
+
+def add_menu_item(api, name, price, available=True):
+    response = api.post("/api/menu", json={
+        "name": name, "name_ar": name, "description": name, "description_ar": name,
+        "price": price, "category": "pastries", "available": available,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture
+def menu(api):
+    return {
+        "croissant": add_menu_item(api, "Croissant", 4.5),
+        "baklava": add_menu_item(api, "Baklava", 7.0),
+        "kunafa": add_menu_item(api, "Kunafa", 12.0, available=False),
+    }
+
+
+@pytest.fixture
+def menu_reads(monkeypatch):
+    """Names of the reads run against menu_items (mongomock emits no command events)."""
+    from mongomock.collection import Collection
+
+    reads = []
+    for name in ("find", "aggregate", "count_documents"):
+        def counted(self, *args, _original=getattr(Collection, name), _name=name, **kwargs):
+            if self.name == "menu_items":
+                reads.append(_name)
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(Collection, name, counted)
+    return reads
+
+
+def place(api, *items):
+    return api.post("/api/orders", json={"customer_name": "Layla", "items": list(items)})
+
+
+def test_prices_and_names_come_from_the_menu(api, menu):
+    response = place(
+        api,
+        {"menu_item_id": menu["croissant"], "quantity": 2, "price": 0.01, "name": "Free croissant"},
+        {"menu_item_id": menu["baklava"], "quantity": 1},
+    )
+    assert response.status_code == 200, response.text
+    order = response.json()
+    assert [(item["name"], item["price"], item["quantity"]) for item in order["items"]] == [
+        ("Croissant", 4.5, 2), ("Baklava", 7.0, 1),
+    ]
+    assert order["total_amount"] == 16.0
+
+
+def test_unknown_and_unavailable_items_are_rejected(api, menu):
+    response = place(
+        api,
+        {"menu_item_id": menu["croissant"], "quantity": 1},
+        {"menu_item_id": "no-such-item", "quantity": 1},
+        {"menu_item_id": menu["kunafa"], "quantity": 1},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"] == ["Unknown menu item: no-such-item", "Kunafa is currently unavailable"]
+    assert api.get("/api/orders").json() == []
+
+
+@pytest.mark.parametrize("quantities", [[], [0], [-2], [1, 0]])
+def test_empty_carts_and_non_positive_quantities_are_rejected(api, menu, quantities):
+    response = place(api, *({"menu_item_id": menu["croissant"], "quantity": quantity} for quantity in quantities))
+    assert response.status_code == 422
+    assert api.get("/api/orders").json() == []
+
+
+def test_a_warm_menu_cache_prices_orders_without_reading_menu_items(api, menu, menu_reads):
+    assert api.get("/api/menu").status_code == 200
+    # The first read after the menu changed loaded it
+    assert menu_reads
+    menu_reads.clear()
+    for _ in range(3):
+        assert place(api, {"menu_item_id": menu["croissant"], "quantity": 1}).status_code == 200
+    assert menu_reads == []
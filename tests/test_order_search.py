@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from order_search import backfill_search_terms, query_terms, rank, search_filter, search_terms
+
+
+def test_names_are_stored_as_normalized_words():
+    assert search_terms("Ahméd  AL-Sayed") == ["ahmed", "al", "sayed"]
+    assert search_terms("أَحْمَد") == ["احمد"]
+
+
+def test_phones_are_stored_as_every_suffix_of_four_digits_or_more():
+    assert search_terms("Layla", "+20 100-1234") == [
+        "001234", "01001234", "01234", "1001234", "1234", "201001234", "layla",
+    ]
+    # Too short to split up, but still searchable whole
+    assert search_terms("Omar", "123") == ["123", "omar"]
+
+
+def test_queries_that_read_as_phone_numbers_are_searched_as_digits():
+    assert query_terms("+20 100") == ["20100"]
+    assert query_terms("١٠٠ ١٢٣٤") == ["1001234"]
+    assert query_terms("Omar A") == ["omar", "a"]
+
+
+@pytest.mark.parametrize("q, found", [
+    ("1234", True),
+    ("100 1234", True),
+    ("+20 100 1234", True),
+    ("4321", False),
+    ("lay", True),
+    ("layla 1234", True),
+    ("ayla", False),
+])
+def test_terms_match_by_prefix(mongo, q, found):
+    async def search():
+        await mongo.orders.insert_one({"id": "order-1", "search_terms": search_terms("Layla", "+20 100-1234")})
+        return await mongo.orders.count_documents(search_filter(query_terms(q)))
+
+    assert asyncio.run(search()) == found
+
+
+def test_exact_matches_rank_above_whole_words_above_leading_prefixes():
+    orders = [
+        {"customer_name": "Mariam Sara", "customer_phone": None},
+        {"customer_name": "Sarah Ali", "customer_phone": None},
+        {"customer_name": "Ali Sara", "customer_phone": None},
+        {"customer_name": "Sara", "customer_phone": None},
+    ]
+    terms = query_terms("sara")
+    ranked = sorted(orders, key=lambda order: rank(order, terms, "sara"))
+    assert [order["customer_name"] for order in ranked] == ["Sara", "Mariam Sara", "Ali Sara", "Sarah Ali"]
+
+
+def test_a_full_phone_number_is_an_exact_match():
+    q = "+20 100 1234"
+    exact = {"customer_name": "Layla", "customer_phone": "+20 100-1234"}
+    # Also matches: the query is a suffix of this number
+    longer = {"customer_name": "Omar", "customer_phone": "+44 20 100 1234"}
+    assert rank(exact, query_terms(q), q) < rank(longer, query_terms(q), q)
+
+
+def test_backfill_indexes_only_orders_without_terms(mongo):
+    async def backfill():
+        await mongo.orders.insert_many(
+            [{"id": f"order-{number}", "customer_name": f"Guest {number}", "customer_phone": "0100 1234"}
+             for number in range(5)]
+            + [{"id": "order-new", "customer_name": "New", "search_terms": ["kept"]}]
+        )
+        updated = await backfill_search_terms(mongo.orders, batch_size=2)
+        return updated, {order["id"]: order["search_terms"] for order in await mongo.orders.find().to_list(None)}
+
+    updated, terms = asyncio.run(backfill())
+    assert updated == 5
+    assert terms["order-3"] == search_terms("Guest 3", "0100 1234")
+    assert terms["order-new"] == ["kept"]
+    assert asyncio.run(backfill_search_terms(mongo.orders)) == 0
+
+
+@pytest.fixture
+def guests(api):
+    """Six orders from guests named Sara, the oldest an exact match."""
+    import server
+
+    base = datetime(2026, 1, 1, 12, 0)
+    names = ["Sara", "Sarah Ali", "Sarah Omar", "Sarah Noor", "Sarah Lina", "Sarah Huda"]
+    documents = [
+        {"id": f"order-{number}", "customer_name": name, "customer_phone": None, "total_amount": 4.5,
+         "status": "completed", "items": [], "created_at": base + timedelta(minutes=number),
+         "updated_at": base + timedelta(minutes=number), "search_terms": search_terms(name)}
+        for number, name in enumerate(names)
+    ]
+    api.portal.call(server.db.orders.insert_many, documents)
+    return server
+
+
+def test_search_ranks_the_matching_orders(api, guests):
+    response = api.get("/api/orders/search", params={"q": "sara"})
+    assert response.status_code == 200
+    assert [order["customer_name"] for order in response.json()][:2] == ["Sara", "Sarah Huda"]
+    assert "search_terms" not in response.json()[0]
+
+
+def test_only_the_newest_candidates_are_ranked(api, guests, monkeypatch):
+    monkeypatch.setattr(guests, "ORDER_SEARCH_CANDIDATES", 3)
+    response = api.get("/api/orders/search", params={"q": "sara", "limit": 10})
+    # The exact match is older than the three newest matches, so it is not among them
+    assert [order["id"] for order in response.json()] == ["order-5", "order-4", "order-3"]
+    # A more specific query still finds older orders
+    assert [order["id"] for order in api.get("/api/orders/search", params={"q": "sarah ali"}).json()] == ["order-1"]
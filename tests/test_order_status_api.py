@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+
+def store_order(api, status="pending", collection="orders"):
+    import server
+
+    created_at = datetime(2026, 1, 1, 12, 0)
+    order = server.Order(
+        id=f"order-{status}", customer_name="Customer", total_amount=4.5, status=status,
+        items=[{"menu_item_id": "croissant", "quantity": 1, "price": 4.5, "name": "Croissant"}],
+        created_at=created_at, updated_at=created_at,
+    )
+    # The status as BSON stores it; mongomock would keep the enum member
+    api.portal.call(server.db[collection].insert_one, {**order.dict(), "status": status})
+    return order.id
+
+
+def change_status(api, order_id, status, expected_status=None):
+    params = {"status": status}
+    if expected_status:
+        params["expected_status"] = expected_status
+    return api.patch(f"/api/orders/{order_id}/status", params=params)
+
+
+def test_an_order_moves_through_the_kitchen(api):
+    order_id = store_order(api)
+    for status in ("preparing", "ready", "completed"):
+        response = change_status(api, order_id, status)
+        assert response.status_code == 200, response.text
+        assert response.json()["status"] == status
+    order = api.get(f"/api/orders/{order_id}").json()
+    assert order["status"] == "completed"
+    assert order["preparing_at"] <= order["ready_at"]
+
+
+@pytest.mark.parametrize("current", ["pending", "preparing", "ready"])
+def test_unfinished_orders_can_be_cancelled(api, current):
+    order_id = store_order(api, current)
+    response = change_status(api, order_id, "cancelled", expected_status=current)
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "cancelled"
+
+
+@pytest.mark.parametrize("current, target", [
+    ("ready", "pending"),
+    ("preparing", "pending"),
+    ("pending", "ready"),
+    ("pending", "completed"),
+    ("completed", "cancelled"),
+    ("cancelled", "preparing"),
+    ("ready", "ready"),
+])
+def test_other_moves_are_conflicts(api, current, target):
+    order_id = store_order(api, current)
+    response = change_status(api, order_id, target)
+    assert response.status_code == 409
+    assert response.json()["detail"] == f"Cannot change order status from {current} to {target}"
+    assert api.get(f"/api/orders/{order_id}").json()["status"] == current
+
+
+def test_a_change_made_meanwhile_is_not_overwritten(api):
+    order_id = store_order(api)
+    # The dashboard still shows pending, but the kitchen started on it
+    assert change_status(api, order_id, "preparing").status_code == 200
+    response = change_status(api, order_id, "cancelled", expected_status="pending")
+    assert response.status_code == 409
+    assert api.get(f"/api/orders/{order_id}").json()["status"] == "preparing"
+
+
+def test_unknown_orders_are_not_found(api):
+    assert change_status(api, "missing", "preparing").status_code == 404
+
+
+def test_archived_orders_are_conflicts(api):
+    order_id = store_order(api, "completed", collection="orders_archive")
+    response = change_status(api, order_id, "cancelled")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Cannot change order status from completed to cancelled"
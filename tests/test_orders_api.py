@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def orders(api):
+    """Seven orders stored directly, three of them created in the same instant."""
+    import server
+
+    base = datetime(2026, 1, 1, 12, 0)
+    created = [base, base, base, base + timedelta(minutes=1), base + timedelta(minutes=2),
+               base + timedelta(minutes=3), base + timedelta(minutes=4)]
+    documents = []
+    for number, created_at in enumerate(created):
+        order = server.Order(
+            id=f"order-{number}", customer_name=f"Customer {number}", total_amount=10.0,
+            items=[{"menu_item_id": "croissant", "quantity": 1, "price": 10.0, "name": "Croissant"}],
+            created_at=created_at, updated_at=created_at + timedelta(minutes=10 - number),
+        )
+        documents.append(order.dict())
+    api.portal.call(server.db.orders.insert_many, documents)
+    return documents
+
+
+def pages(api, **params):
+    cursor, ids = None, []
+    while True:
+        response = api.get("/api/orders", params={**params, **({"after": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        ids.append([order["id"] for order in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+def test_pages_walk_every_order_newest_first(api, orders):
+    newest_first = [order["id"] for order in sorted(orders, key=lambda order: (order["created_at"], order["id"]), reverse=True)]
+    assert pages(api, limit=3) == [newest_first[0:3], newest_first[3:6], newest_first[6:]]
+
+
+def test_pages_of_changes_walk_oldest_change_first(api, orders):
+    since = min(order["updated_at"] for order in orders) - timedelta(seconds=1)
+    ids = [order_id for page in pages(api, limit=2, updated_since=since.isoformat()) for order_id in page]
+    assert ids == [order["id"] for order in sorted(orders, key=lambda order: order["updated_at"])]
+
+
+def test_summary_pages_use_the_same_cursor(api, orders):
+    assert pages(api, limit=3, view="summary") == pages(api, limit=3)
+
+
+def test_bad_cursors_are_rejected(api, orders):
+    cursor = api.get("/api/orders", params={"limit": 1}).headers["X-Next-Cursor"]
+    assert api.get("/api/orders", params={"after": "not-a-cursor"}).status_code == 400
+    # A created_at cursor cannot continue an updated_since listing
+    response = api.get("/api/orders", params={"after": cursor, "updated_since": "2026-01-01T00:00:00"})
+    assert response.status_code == 400
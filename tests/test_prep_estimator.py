@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from prep_estimator import PrepEstimator
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def order(number, status="pending", items=("croissant",), prep_seconds=None, started_seconds_ago=None):
+    preparing_at = ready_at = None
+    if prep_seconds is not None:
+        preparing_at = NOW - timedelta(seconds=prep_seconds)
+        ready_at = NOW
+    elif started_seconds_ago is not None:
+        preparing_at = NOW - timedelta(seconds=started_seconds_ago)
+    return SimpleNamespace(
+        id=f"order-{number}", status=status, created_at=NOW + timedelta(seconds=number),
+        items=[SimpleNamespace(menu_item_id=item) for item in items],
+        preparing_at=preparing_at, ready_at=ready_at,
+    )
+
+
+def test_one_order_only_moves_the_default_part_of_the_way():
+    estimator = PrepEstimator(default_seconds=300, alpha=0.1, prior_samples=5)
+    estimator.observe(order(0, "ready", prep_seconds=600))
+    assert estimator.prep_seconds(order(1)) == pytest.approx(350)
+    # The mean of the samples and five at the default
+    estimator.observe(order(2, "ready", prep_seconds=650))
+    assert estimator.prep_seconds(order(3)) == pytest.approx((5 * 300 + 600 + 650) / 7)
+
+
+def test_estimates_settle_on_the_kitchen_pace():
+    estimator = PrepEstimator(default_seconds=300)
+    for number in range(30):
+        estimator.observe(order(number, "ready", prep_seconds=120))
+    assert estimator.prep_seconds(order(99)) == pytest.approx(120, abs=1)
+
+
+@pytest.mark.parametrize("seconds", [0, 5, 29, 7201])
+def test_implausible_prep_times_are_discarded(seconds):
+    estimator = PrepEstimator(default_seconds=300)
+    estimator.observe(order(0, "ready", prep_seconds=seconds))
+    assert estimator.stats()["discarded"] == 1
+    assert estimator.stats()["observed"] == 0
+    assert estimator.prep_seconds(order(1)) == 300
+
+
+def test_orders_that_are_not_ready_are_ignored():
+    estimator = PrepEstimator()
+    estimator.observe(order(0, "preparing", started_seconds_ago=60))
+    assert estimator.stats() == {"observed": 0, "discarded": 0, "items": 0, "overall_seconds": 300}
+
+
+def test_an_order_takes_as_long_as_its_slowest_item():
+    estimator = PrepEstimator(default_seconds=300, prior_samples=0)
+    estimator.observe(order(0, "ready", items=("coffee",), prep_seconds=60))
+    # Items not seen yet take the overall mean
+    assert estimator.prep_seconds(order(1, items=("coffee",))) == 60
+    assert estimator.prep_seconds(order(2, items=("coffee", "sandwich"))) == 60
+    estimator.observe(order(3, "ready", items=("sandwich",), prep_seconds=600))
+    assert estimator.prep_seconds(order(4, items=("coffee", "sandwich"))) == 600
+
+
+def test_pending_orders_wait_for_the_orders_ahead_of_them():
+    estimator = PrepEstimator(default_seconds=300, stations=2)
+    active = [
+        order(0, "preparing", started_seconds_ago=100),
+        order(1, "pending"),
+        order(2, "pending"),
+        order(3, "ready"),
+    ]
+    estimate = estimator.estimate(active[2], active, NOW)
+    # (200 left + 300) shared by two stations, then its own 300
+    assert estimate["orders_ahead"] == 2
+    assert estimate["estimated_wait_seconds"] == 550
+    assert estimate["estimated_ready_at"] == NOW + timedelta(seconds=550)
+    # Being prepared already: only what is left of its own prep
+    assert estimator.estimate(active[0], active, NOW)["estimated_wait_seconds"] == 200
+    assert estimator.estimate(active[3], active, NOW)["estimated_wait_seconds"] is None
+
+
+def test_queue_shows_the_wait_a_new_order_would_face():
+    estimator = PrepEstimator(default_seconds=300, stations=2)
+    active = [order(0, "preparing", started_seconds_ago=100), order(1, "pending"), order(2, "ready")]
+    assert estimator.queue(active, NOW) == {"pending": 1, "preparing": 1, "estimated_wait_seconds": 550}
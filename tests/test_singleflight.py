@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": "order-1"}
+
+    async def burst():
+        return await asyncio.gather(*(flight.do("order-1", load) for _ in range(10)))
+
+    results = asyncio.run(burst())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 1, "shared": 9, "inflight": 0}
+
+
+def test_calls_after_completion_run_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    async def sequential():
+        return [await flight.do("key", load), await flight.do("key", load)]
+
+    assert asyncio.run(sequential()) == [1, 2]
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise LookupError("down")
+
+    async def burst():
+        return await asyncio.gather(*(flight.do("key", load) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, LookupError) for result in asyncio.run(burst()))
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "menu"
+
+    async def burst():
+        first = asyncio.create_task(flight.do("key", load))
+        second = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(burst()) == "menu"
+
+
+def test_disabled_runs_every_call():
+    flight = SingleFlight(enabled=False)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def burst():
+        await asyncio.gather(*(flight.do("key", load) for _ in range(3)))
+
+    asyncio.run(burst())
+    assert len(calls) == 3
+
+
+def test_calls_after_forget_do_not_join_the_stale_call():
+    flight = SingleFlight()
+    status = {"value": "pending"}
+    reading = []
+
+    async def load():
+        value = status["value"]
+        reading.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def read_during_write():
+        before = asyncio.create_task(flight.do("order-1", load))
+        while not reading:
+            await asyncio.sleep(0)
+        status["value"] = "preparing"
+        flight.forget("order-1")
+        after = await flight.do("order-1", load)
+        return await before, after
+
+    assert asyncio.run(read_during_write()) == ("pending", "preparing")
+    assert flight.stats()["inflight"] == 0
@@ -0,0 +1,49 @@
+import pytest
+
+from text_normalize import digits, is_phone, normalize, strip_article, tokens
+
+
+@pytest.mark.parametrize("variant, plain", [
+    ("أحمد", "احمد"),          # hamza above alef
+    ("إيمان", "ايمان"),        # hamza below alef
+    ("آمنة", "امنه"),          # madda, and teh marbuta
+    ("مؤمن", "مومن"),          # hamza on waw
+    ("مصطفى", "مصطفي"),        # alef maksura
+    ("ٱلقهوة", "القهوه"),      # alef wasla
+    ("قـهـوة", "قهوه"),        # tatweel
+    ("أَحْمَد", "احمد"),         # harakat
+    ("Ahméd", "ahmed"),
+    ("CAFÉ Latte", "cafe latte"),
+])
+def test_spelling_variants_normalize_alike(variant, plain):
+    assert normalize(variant) == normalize(plain) == plain
+
+
+def test_tokens_split_words_after_normalizing():
+    assert tokens("Café  au-lait, ٢ أكواب") == ["cafe", "au", "lait", "2", "اكواب"]
+
+
+@pytest.mark.parametrize("word, stripped", [
+    ("الحليب", "حليب"),
+    ("القهوه", "قهوه"),
+    # Too short to be the article on a word
+    ("الف", "الف"),
+    ("شاي", "شاي"),
+])
+def test_the_definite_article_is_stripped_from_longer_words(word, stripped):
+    assert strip_article(word) == stripped
+
+
+@pytest.mark.parametrize("text, phone", [
+    ("+20 100-123", True),
+    ("٠١٠٠١٢٣", True),
+    ("(02) 555.1234", True),
+    ("12", False),
+    ("Layla 0100", False),
+])
+def test_phone_numbers_are_recognized(text, phone):
+    assert is_phone(text) is phone
+
+
+def test_digits_keep_only_folded_digits():
+    assert digits("+٢٠ 100-۱۲۳") == "20100123"